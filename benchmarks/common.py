@@ -0,0 +1,34 @@
+"""Synthetic samples for the benchmarks, so they run without downloading data"""
+
+from __future__ import annotations
+
+import numpy as np
+from orix.crystal_map import Phase
+from orix.vector import Miller, Vector3d
+
+from tiltlib import Axis, Sample
+
+N_PIXELS = [10**4, 10**5, 10**6, 10**7]
+N_AXES = [1, 2, 3]
+
+
+def axes(n_axes: int) -> list[Axis]:
+    """Double tilt holder, with an optional rotation about the optical axis"""
+    return [
+        Axis(Vector3d.xvector(), -30, 30),
+        Axis(Vector3d.yvector(), -30, 30, intrinsic=True),
+        Axis(Vector3d.zvector(), -30, 30, intrinsic=True),
+    ][:n_axes]
+
+
+def sample(n_pixels: int, n_axes: int, **kwargs) -> Sample:
+    """Square sample of uniformly random cubic orientations"""
+    side = int(round(np.sqrt(n_pixels)))
+    rng = np.random.default_rng(0)
+    quats = rng.normal(size=(side, side, 4))
+    quats /= np.linalg.norm(quats, axis=-1, keepdims=True)
+    return Sample(quats, Phase(point_group="m-3m"), axes(n_axes), **kwargs)
+
+
+def zone_axis(s: Sample) -> Miller:
+    return Miller(uvw=[1, 1, 1], phase=s.phase)
@@ -0,0 +1,9 @@
+class TimeImport:
+    """Import time of the package in a fresh interpreter, against its orix dependency.
+    Importing the package should take about as long as importing orix"""
+
+    def timeraw_import_tiltlib(self):
+        return "import tiltlib"
+
+    def timeraw_import_orix(self):
+        return "from orix.quaternion import Rotation"
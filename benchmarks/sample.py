@@ -0,0 +1,107 @@
+import numpy as np
+from hyperspy.roi import RectangularROI
+
+from tiltlib import warmup
+
+from .common import N_AXES, N_PIXELS, sample, zone_axis
+
+
+class KernelBenchmark:
+    def setup_cache(self):
+        # Compile the kernels once, instead of in the first timed call of a process
+        warmup()
+
+
+class TimeOrientations:
+    params = (N_PIXELS, N_AXES)
+    param_names = ["n_pixels", "n_axes"]
+    timeout = 300
+
+    def setup(self, n_pixels: int, n_axes: int):
+        self.sample = sample(n_pixels, n_axes, cache_orientations=False)
+        self.sample.rotate_to(*[10.0] * n_axes, degrees=True)
+
+    def time_orientations(self, n_pixels: int, n_axes: int):
+        self.sample.orientations
+
+
+class TimeAngleWith(KernelBenchmark):
+    params = (N_PIXELS, N_AXES)
+    param_names = ["n_pixels", "n_axes"]
+    timeout = 300
+
+    def setup(self, n_pixels: int, n_axes: int):
+        self.sample = sample(n_pixels, n_axes)
+        self.zone_axis = zone_axis(self.sample)
+
+    def time_angle_with(self, n_pixels: int, n_axes: int):
+        self.sample.angle_with(self.zone_axis)
+
+    def time_angle_with_parallel(self, n_pixels: int, n_axes: int):
+        self.sample.angle_with(self.zone_axis, workers=-1)
+
+    def peakmem_angle_with(self, n_pixels: int, n_axes: int):
+        self.sample.angle_with(self.zone_axis)
+
+
+class TimeFindTiltAngles(KernelBenchmark):
+    # Each search scores every pixel a few hundred times, which takes minutes at 10^7
+    params = (N_PIXELS[:-1], N_AXES)
+    param_names = ["n_pixels", "n_axes"]
+    timeout = 600
+    number = 1
+    repeat = (1, 5, 120.0)
+
+    def setup(self, n_pixels: int, n_axes: int):
+        self.sample = sample(n_pixels, n_axes)
+        self.zone_axis = zone_axis(self.sample)
+
+    def time_find_tilt_angles(self, n_pixels: int, n_axes: int):
+        self.sample.find_tilt_angles(self.zone_axis)
+
+    def time_find_tilt_angles_gradient(self, n_pixels: int, n_axes: int):
+        self.sample.find_tilt_angles(self.zone_axis, method="L-BFGS-B")
+
+    def time_find_tilt_angles_mean_orientation(self, n_pixels: int, n_axes: int):
+        self.sample.find_tilt_angles(self.zone_axis, use_mean_orientation=True)
+
+
+class TimeScoreLandscape(KernelBenchmark):
+    """The scoring loop of :meth:`Sample.plot_angle_with`, which supports 1 and 2 axes"""
+
+    params = (N_PIXELS[:-1], [1, 2])
+    param_names = ["n_pixels", "n_axes"]
+    timeout = 600
+    number = 1
+    repeat = (1, 5, 120.0)
+
+    def setup(self, n_pixels: int, n_axes: int):
+        self.sample = sample(n_pixels, n_axes)
+        self.zone_axis = zone_axis(self.sample)
+
+    def time_score_landscape(self, n_pixels: int, n_axes: int):
+        self.sample.score_landscape(self.zone_axis, resolution=5.0)
+
+    def time_score_landscape_parallel(self, n_pixels: int, n_axes: int):
+        self.sample.score_landscape(self.zone_axis, resolution=5.0, workers=-1)
+
+
+class TimeCrop:
+    params = N_PIXELS
+    param_names = ["n_pixels"]
+    timeout = 300
+
+    def setup(self, n_pixels: int):
+        self.sample = sample(n_pixels, 2)
+        side = self.sample.shape[0]
+        self.roi = RectangularROI(
+            left=side // 4, top=side // 4, right=side // 2, bottom=side // 2
+        )
+        self.mask = np.zeros(self.sample.shape, dtype=bool)
+        self.mask[::3, ::2] = True
+
+    def time_crop_rectangle(self, n_pixels: int):
+        self.sample.crop(self.roi)
+
+    def time_crop_mask(self, n_pixels: int):
+        self.sample.crop(self.mask)
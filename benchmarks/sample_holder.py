@@ -0,0 +1,18 @@
+from tiltlib import SampleHolder
+
+from .common import N_AXES, axes
+
+
+class TimeSampleHolder:
+    params = N_AXES
+    param_names = ["n_axes"]
+
+    def setup(self, n_axes: int):
+        self.holder = SampleHolder(axes(n_axes))
+        self.angles = [10.0] * n_axes
+
+    def time_rotate_to(self, n_axes: int):
+        self.holder.rotate_to(*self.angles, degrees=True)
+
+    def time_rotation(self, n_axes: int):
+        self.holder._rotation
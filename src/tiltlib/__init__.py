@@ -1,8 +1,26 @@
-from .sample import Sample
+from __future__ import annotations
+
+from .profiling import TiltReport
 from .sample_holder import Axis, SampleHolder
 
 __all__ = [
     "Axis",
     "SampleHolder",
     "Sample",
+    "TiltReport",
+    "warmup",
 ]
+
+
+def __getattr__(name: str):
+    # Sample pulls in the crystal map, plotting and hyperspy machinery,
+    # so it is only imported on first access
+    if name in ("Sample", "warmup"):
+        from . import sample
+
+        return getattr(sample, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + ["Sample", "warmup"])
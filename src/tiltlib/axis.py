@@ -1,6 +1,7 @@
 import copy
 from dataclasses import dataclass
 
+import numpy as np
 from numpy import deg2rad, rad2deg
 from orix.quaternion import Rotation
 from orix.vector import Vector3d
@@ -49,6 +50,21 @@ class Axis:
             self.direction, self.angle - self._initial_angle
         )
 
+    def _quaternions(self, angles: np.ndarray) -> np.ndarray:
+        """Quaternion data of the axis rotation at many angles at once
+
+        :param angles: Tilt angles, in radians
+        :type angles: np.ndarray
+        :return: Quaternions, with shape :code:`(*angles.shape, 4)`
+        :rtype: np.ndarray
+        """
+        direction = self.direction.unit.data.reshape(3)
+        half = 0.5 * (np.asarray(angles, dtype=float) - self._initial_angle)
+        q = np.empty(half.shape + (4,))
+        q[..., 0] = np.cos(half)
+        q[..., 1:] = np.sin(half)[..., np.newaxis] * direction
+        return q
+
     def __repr__(self) -> str:
         return f"""{self.__class__.__name__}:
         direction = [{self.direction.x[0]}, {self.direction.y[0]}, {self.direction.z[0]}]
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+STAGES = ("setup", "holder", "read", "kernel", "optimizer")
+
+
+@dataclass
+class TiltReport:
+    """Timings and counters of tilt angle searches.
+
+    Pass a report to :meth:`tiltlib.Sample.find_tilt_angles` to fill it in. A report
+    accumulates over every search it is passed to, and may be shared between threads.
+
+    The stage timings are in seconds, summed over all threads:
+
+    - :code:`"setup"`: preparing the search, including closed-form solutions
+    - :code:`"holder"`: validating tilt angles and composing the holder rotations
+    - :code:`"read"`: reading and normalizing chunks of quaternions, and the mean orientation
+    - :code:`"kernel"`: the compiled kernels, which tilt the optical axis, reduce it to
+      the fundamental sector and measure the angle to the zone axis
+    - :code:`"optimizer"`: scipy, outside of the objective function
+    - :code:`"total"`: wall time of the searches
+
+    The counters are :code:`"searches"`, :code:`"objective_calls"`,
+    :code:`"gradient_calls"`, :code:`"iterations"`, :code:`"tilt_states"` (holder
+    rotations scored), :code:`"pixel_evaluations"` (pixels or grains times tilt states),
+    and :code:`"cache_hits"` and :code:`"cache_misses"` of the mean orientation.
+
+    :param timings: Seconds spent in each stage, defaults to empty
+    :type timings: dict[str, float], optional
+    :param counts: Counters, defaults to empty
+    :type counts: dict[str, int], optional
+    """
+
+    timings: dict[str, float] = field(default_factory=dict)
+    counts: dict[str, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
+
+    def _add_time(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + int(n)
+
+    def as_dict(self) -> dict[str, dict]:
+        """Timings and counters as plain dictionaries, for logging or serialization
+
+        :rtype: dict[str, dict]
+        """
+        with self._lock:
+            return {"timings": dict(self.timings), "counts": dict(self.counts)}
+
+    def reset(self) -> None:
+        """Clear all timings and counters"""
+        with self._lock:
+            self.timings.clear()
+            self.counts.clear()
+
+    def __str__(self) -> str:
+        report = self.as_dict()
+        total = report["timings"].get("total", 0.0)
+        lines = [f"{self.__class__.__name__}:"]
+        for stage in STAGES + ("total",):
+            seconds = report["timings"].get(stage, 0.0)
+            share = f"{100 * seconds / total:5.1f} %" if total else ""
+            lines.append(f"    {stage:<18}{seconds:10.4f} s  {share}")
+        for name, n in report["counts"].items():
+            lines.append(f"    {name:<18}{n:10d}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def _timed(report: TiltReport | None, stage: str) -> Iterator[None]:
+    """Add the time spent in the block to a stage of the report, if there is one"""
+    if report is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        report._add_time(stage, time.perf_counter() - start)
@@ -1,139 +1,1396 @@
 from __future__ import annotations
 
-from typing import Callable
-
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+import multiprocessing
+from multiprocessing import shared_memory
+import os
+import time
+import types
+from typing import TYPE_CHECKING, Callable, Iterator
+
+import dask.array as da
 import numpy as np
 from matplotlib import pyplot as plt
 from matplotlib.gridspec import GridSpec
+from matplotlib.path import Path
 from matplotlib.widgets import Slider
 from orix.crystal_map import CrystalMap, Phase
 from orix.plot import IPFColorKeyTSL
 from orix.plot.inverse_pole_figure_plot import _get_ipf_axes_labels
-from orix.quaternion import Orientation, Rotation
+from orix.quaternion import Orientation, Rotation, Symmetry
 from orix.vector import Vector3d, Miller
 from orix.vector.fundamental_sector import _closed_edges_in_hemisphere
 from orix.projections import StereographicProjection
-from scipy.optimize import minimize
-from hyperspy.signals import Signal1D
-from hyperspy.roi import BaseROI, CircleROI, RectangularROI
-from numba import njit
+from scipy.optimize import OptimizeResult, minimize
+from scipy.spatial import cKDTree
+import numba
+from numba import njit, prange
+
+from tiltlib.profiling import TiltReport, _timed
+from tiltlib.sample_holder import Axis, SampleHolder, _quaternion_multiply
+
+if TYPE_CHECKING:
+    # hyperspy is only needed for ROIs and signals, and is imported on first use
+    from hyperspy.roi import BaseROI
+    from hyperspy.signals import Signal1D
 
-from tiltlib.sample_holder import Axis, SampleHolder
+
+_DERIVATIVE_FREE_METHODS = ("Nelder-Mead", "Powell")
+_GRADIENT_METHODS = ("L-BFGS-B", "TNC", "SLSQP", "trust-constr")
+_SAMPLING_METHODS = ("stratified", "random")
+# Bins of 0.01 degrees between 0 and 180 degrees, for the percentiles of the angles
+_HISTOGRAM_BINS = 18000
+# Initial step in degrees of local searches on percentiles, which change in steps
+_PERCENTILE_STEP = 1.0
 
 
 class Sample(SampleHolder):
 
-    def __init__(self, oris: Orientation, phase: Phase, axes: list[Axis]) -> None:
+    def __init__(
+        self,
+        oris: Orientation | np.ndarray,
+        phase: Phase,
+        axes: list[Axis],
+        chunk_size: int = 2**20,
+        cache_orientations: bool = None,
+        copy: bool = True,
+        dtype: type = np.float64,
+    ) -> None:
         """Sample of spatially distinct orientations
 
-        :param oris: The orientations at each point of the sample
-        :type oris: Orientation
+        :param oris: The orientations at each point of the sample, or their quaternions
+            with shape :code:`(..., 4)`. Memory-mapped arrays, HDF5 datasets and
+            Dask arrays are not copied, and scores are computed by streaming over them
+        :type oris: Orientation | np.ndarray
         :param phase: Crystallographic phase of the sample. Only single-phase crystals are supported
         :type phase: Phase
         :param axes: Tilt axes
         :type axes: list[Axis]
+        :param chunk_size: Approximate number of pixels per chunk when streaming over array-like data, defaults to 2**20
+        :type chunk_size: int, optional
+        :param cache_orientations: Whether to keep the tilted orientations for repeated access at the same tilt angles.
+            Disable to save memory. None caches them for in-memory data only, as caching
+            streamed data would hold all of it in memory, defaults to None
+        :type cache_orientations: bool, optional
+        :param copy: Whether to copy an in-memory array of quaternions. If False, the sample
+            refers to the given array and streams over it like array-like data, defaults to True
+        :type copy: bool, optional
+        :param dtype: Floating point type of the stored quaternions, of the compiled kernels
+            and of the per-pixel results. :code:`np.float32` halves the memory use and is
+            accurate to about 1e-5 degrees, defaults to np.float64
+        :type dtype: type, optional
+        :raises ValueError: If :code:`dtype` is not np.float32 or np.float64
         """
         SampleHolder.__init__(self, axes)
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.float32, np.float64):
+            raise ValueError(f"`dtype` must be np.float32 or np.float64, got {dtype}")
         self.phase = phase
-        self._original_rotations = Rotation(oris.data.copy())
+        if isinstance(oris, Rotation):
+            oris = oris.data
+        # Memory-mapped and lazy data is read in chunks instead of copied
+        self._streamed = (
+            not copy
+            or not isinstance(oris, np.ndarray)
+            or isinstance(oris, np.memmap)
+        )
+        if self._streamed:
+            self._rotations = None
+            self._quaternions = oris
+        elif self.dtype == np.float64:
+            self._rotations = Rotation(oris.copy())
+            self._quaternions = self._rotations.data
+        else:
+            # Orix works in double precision, so rotations are only created when needed
+            self._rotations = None
+            quats = np.array(oris, dtype=self.dtype)
+            quats /= np.linalg.norm(quats, axis=-1, keepdims=True)
+            self._quaternions = quats
+        self.chunk_size = chunk_size
+        if cache_orientations is None:
+            cache_orientations = not self._streamed
+        self.cache_orientations = cache_orientations
+        # Flat indices of the pixels into the data, for masked crops
+        self._index = None
+        # Shape of the parent sample, bounding box and flat indices within it, for crops
+        self._parent = None
+        self._orientations_cache = None
+        self._mean_quaternion = None
+        self._reachability_index = {}
         self.optical_axis_miller = Miller(uvw=[0, 0, 1], phase=self.phase)
         self.optical_axis = self.optical_axis_miller.unit
+        self._symmetry = tuple(
+            a.astype(self.dtype) for a in _symmetry_arrays(self.phase.point_group)
+        )
+        self._grain_quaternions = None
+        self._grain_labels = None
+        self._grain_weights = None
 
     @classmethod
-    def from_crystal_map(cls, xmap: CrystalMap, axes: list[Axis]) -> "Sample":
+    def from_crystal_map(
+        cls, xmap: CrystalMap, axes: list[Axis], dtype: type = np.float64
+    ) -> "Sample":
         """Initialize a Sample from a CrystalMap
 
         :param xmap: Orientation map
         :type xmap: CrystalMap
         :param axes: Tilt axes
         :type axes: list[Axis]
+        :param dtype: Floating point type of the sample, see :class:`Sample`, defaults to np.float64
+        :type dtype: type, optional
         """
         oris = xmap.orientations.reshape(*xmap.shape)
-        return cls(oris, xmap.phases[0], axes)
+        return cls(oris, xmap.phases[0], axes, dtype=dtype)
+
+    @classmethod
+    def from_npy(
+        cls,
+        path: str,
+        phase: Phase,
+        axes: list[Axis],
+        chunk_size: int = 2**20,
+        dtype: type = np.float64,
+    ) -> "Sample":
+        """Initialize a Sample from quaternions stored in a .npy-file,
+        which is memory-mapped instead of read into memory
+
+        :param path: Path to a .npy-file with quaternions, with shape :code:`(..., 4)`
+        :type path: str
+        :param phase: Crystallographic phase of the sample
+        :type phase: Phase
+        :param axes: Tilt axes
+        :type axes: list[Axis]
+        :param chunk_size: Approximate number of pixels per chunk, defaults to 2**20
+        :type chunk_size: int, optional
+        :param dtype: Floating point type of the sample, see :class:`Sample`, defaults to np.float64
+        :type dtype: type, optional
+        """
+        return cls(
+            np.load(path, mmap_mode="r"), phase, axes, chunk_size, dtype=dtype
+        )
+
+    @property
+    def _original_rotations(self) -> Rotation:
+        """The untilted orientations as rotations. Streamed samples read them into
+        memory, and single-precision samples create them in double precision,
+        on every access, so that they are not kept in memory.
+        """
+        if self._rotations is not None:
+            return self._rotations
+        if self._index is None:
+            rotations = Rotation(np.asarray(self._quaternions, dtype=float))
+        else:
+            rotations = Rotation(self._flat_quaternions().astype(float))
+        # Neither out-of-core data nor a double-precision copy of single-precision
+        # data is kept in memory
+        if self.dtype == np.float64 and not self._streamed:
+            self._rotations = rotations
+        return rotations
+
+    @property
+    def _optical_axis_data(self) -> np.ndarray:
+        """The optical axis as an array with shape :code:`(3,)`, for the compiled kernels"""
+        return self.optical_axis.data.reshape(3).astype(self.dtype)
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        """Shape of the sample, in pixels"""
+        if self._index is not None:
+            return self._index.shape
+        return tuple(self._quaternions.shape[:-1])
+
+    def _chunks(self) -> Iterator[tuple[slice, np.ndarray]]:
+        """Iterate over the untilted quaternions in chunks of whole rows
+
+        :return: Slices into the flattened pixels, and normalized quaternions with shape :code:`(n, 4)`
+        :rtype: Iterator[tuple[slice, np.ndarray]]
+        """
+        if not self._streamed:
+            yield slice(None), self._quaternions.reshape(-1, 4)
+            return
+
+        if self._index is not None:
+            yield from self._crop_chunks()
+            return
+
+        shape = self.shape
+        row_size = int(np.prod(shape[1:]))
+        rows = max(1, self.chunk_size // row_size)
+        for start in range(0, shape[0], rows):
+            stop = min(start + rows, shape[0])
+            chunk = np.array(self._quaternions[start:stop], dtype=self.dtype)
+            chunk = chunk.reshape(-1, 4)
+            chunk /= np.linalg.norm(chunk, axis=-1, keepdims=True)
+            yield slice(start * row_size, stop * row_size), chunk
+
+    def _crop_chunks(self) -> Iterator[tuple[slice, np.ndarray]]:
+        """Iterate over the pixels of a masked crop in chunks of :code:`chunk_size` pixels.
+        In-memory data is gathered directly. Memory-mapped, HDF5 and Dask data is read in
+        blocks of rows of about :code:`chunk_size` pixels, skipping the rows without
+        selected pixels.
+
+        :return: Slices into the flattened pixels, and normalized quaternions with shape :code:`(n, 4)`
+        :rtype: Iterator[tuple[slice, np.ndarray]]
+        """
+        data = self._quaternions
+        in_memory = isinstance(data, np.ndarray) and not isinstance(data, np.memmap)
+        row_size = int(np.prod(data.shape[1:-1]))
+        block_rows = max(1, self.chunk_size // row_size)
+        for start in range(0, self._index.size, self.chunk_size):
+            index = self._index[start : start + self.chunk_size]
+            if in_memory:
+                chunk = data[np.unravel_index(index, data.shape[:-1])]
+                chunk = chunk.astype(self.dtype, copy=False)
+            else:
+                # Crop indices need not be sorted, so blocks are read in sorted order
+                order = np.argsort(index, kind="stable")
+                rows = index[order] // row_size
+                chunk = np.empty((index.size, 4), dtype=self.dtype)
+                begin = 0
+                while begin < index.size:
+                    first = int(rows[begin])
+                    end = np.searchsorted(rows, first + block_rows)
+                    block = np.array(data[first : first + block_rows], dtype=self.dtype)
+                    picked = order[begin:end]
+                    block = block.reshape(-1, 4)
+                    chunk[picked] = block[index[picked] - first * row_size]
+                    begin = end
+            chunk /= np.linalg.norm(chunk, axis=-1, keepdims=True)
+            yield slice(start, start + index.size), chunk
+
+    def _flat_quaternions(self) -> np.ndarray:
+        """All normalized untilted quaternions, with shape :code:`(n, 4)`.
+        In-memory data is not copied
+
+        :rtype: np.ndarray
+        """
+        if not self._streamed:
+            return self._quaternions.reshape(-1, 4)
+        return np.concatenate([chunk for _, chunk in self._chunks()])
+
+    def _mean_rotation(self) -> Rotation:
+        """Mean of the untilted orientations, computed in chunks and cached
+
+        :return: Mean rotation, like :meth:`orix.quaternion.Quaternion.mean`
+        :rtype: Rotation
+        """
+        if self._mean_quaternion is None:
+            QQ = np.zeros((4, 4))
+            for _, chunk in self._chunks():
+                chunk = chunk.astype(float, copy=False)
+                QQ += chunk.T @ chunk
+            w, v = np.linalg.eigh(QQ)
+            self._mean_quaternion = v[:, np.argmax(w)]
+        return Rotation(self._mean_quaternion)
 
     @property
     def orientations(self) -> Orientation:
-        """The orientations of the sample at the current tilts
+        """The orientations of the sample at the current tilts. If
+        :code:`cache_orientations` is True, they are reused until the tilt angles change.
 
         :return: Tilted orientations
         :rtype: Orientation
         """
-        r = self._original_rotations
-        r *= ~self._rotation
-        o = Orientation(r.data, symmetry=self.phase.point_group)
+        key = tuple(self.angles)
+        cached = self._orientations_cache
+        if not self.cache_orientations:
+            self._orientations_cache = None
+        elif cached is not None and cached[0] == key:
+            return cached[1]
+
+        o = self.orientations_at(self.angles)
+        if self.cache_orientations:
+            self._orientations_cache = (key, o)
         return o
 
-    def crop(self, roi: BaseROI) -> "Sample":
-        """Crop the sample with a hyperspy ROI and return a new cropped sample
+    def orientations_at(
+        self, angles: tuple[float, ...], degrees: bool = False
+    ) -> Orientation:
+        """The orientations of the sample at the given tilt angles.
+        The tilt angles of the sample holder are not changed, so this is safe to call
+        from several threads at once.
 
-        :param roi: Region of interest to keep
-        :type roi: BaseROI
+        :param angles: Tilt angles, in order of tilt axes
+        :type angles: tuple[float, ...]
+        :param degrees: Whether angles are in degrees(True) or radians(False), defaults to False
+        :type degrees: bool, optional
+        :raises ValueError: If the angles do not match the tilt axes
+        :raises IndexError: If any angle is out of range for its axis
+        :return: Tilted orientations
+        :rtype: Orientation
+        """
+        angles = np.asarray(angles, dtype=float)
+        if degrees:
+            angles = np.deg2rad(angles)
+        holder = Rotation(self._quaternions_at(angles.reshape(1, -1)))
+        r = self._original_rotations * ~holder
+        return Orientation(r.data, symmetry=self.phase.point_group)
+
+    def crop(self, roi: BaseROI | np.ndarray, label: int = None) -> "Sample":
+        """Crop the sample and return a new cropped sample. The cropped sample refers to the
+        orientation data of this sample instead of copying it, and reads its pixels from it
+        when needed.
+
+        :param roi: Region of interest to keep. Either a hyperspy :code:`RectangularROI`,
+            :code:`CircleROI` or :code:`PolygonROI`, a boolean mask or a label image with the
+            shape of the sample, or flat indices of the pixels to keep
+        :type roi: BaseROI | np.ndarray
+        :param label: Label of the pixels to keep, if :code:`roi` is a label image
+        :type label: int, optional
         :raises NotImplementedError: If an unsupported ROI is supplied
-        :return: Cropped sample
+        :raises ValueError: If the region of interest contains no pixels,
+            or a mask or label image does not have the shape of the sample
+        :return: Cropped sample. A rectangular crop keeps the shape of the rectangle,
+            while other crops are flattened to the selected pixels, in row-major order for masks
         :rtype: Sample
         """
+        slices, index = self._crop_index(roi, label)
+        if self._index is None and index is None:
+            data = self._quaternions[slices]
+            data_index = None
+        elif self._index is None:
+            # Masked crops index into the whole data, which is then read row block by
+            # row block instead of through the bounding box
+            data = self._quaternions
+            data_index = _flat_index(self.shape, slices, index).reshape(-1)
+        else:
+            # Crops of a flattened crop index into the same data
+            data = self._quaternions
+            data_index = self._index[slices]
+            if index is not None:
+                data_index = data_index[index]
+
+        cropped = self.__class__(
+            data,
+            self.phase,
+            self.axes,
+            self.chunk_size,
+            self.cache_orientations,
+            copy=False,
+            dtype=self.dtype,
+        )
+        cropped._index = data_index
+        cropped._parent = (self.shape, slices, index)
+        return cropped
+
+    @property
+    def parent_index(self) -> np.ndarray | None:
+        """Flat indices of the pixels of this sample into the sample it was cropped from,
+        with the shape of this sample. None if the sample is not a crop
+        """
+        if self._parent is None:
+            return None
+        return _flat_index(*self._parent)
+
+    def _crop_index(
+        self, roi: BaseROI | np.ndarray, label: int = None
+    ) -> tuple[tuple[slice, ...], np.ndarray | None]:
+        """Bounding box of a region of interest, and the flat indices of its pixels within
+        the bounding box. The indices are None if every pixel of the bounding box is included
+
+        :raises NotImplementedError: If an unsupported ROI is supplied
+        :raises ValueError: If the region of interest contains no pixels,
+            or a mask or label image does not have the shape of the sample
+        """
+        from hyperspy.roi import CircleROI, PolygonROI, RectangularROI
+
         if isinstance(roi, RectangularROI):
             top = int(roi.top)
             bottom = int(roi.bottom)
             left = int(roi.left)
             right = int(roi.right)
             slices = (slice(top, bottom, None), slice(left, right, None))
-        elif isinstance(roi, CircleROI):
+            return _nonempty(roi, self.shape, slices, None)
+
+        if isinstance(roi, CircleROI):
             cx = int(roi.cx)
             cy = int(roi.cy)
             r = roi.r
-            x = np.arange(self._original_rotations.shape[1], dtype=float)
-            y = np.arange(self._original_rotations.shape[0], dtype=float)
-            x, y = np.meshgrid(x, y)
-            x -= cx
-            y -= cy
-            mask = (x**2 + y**2) < r**2
-            slices = mask
+            slices = tuple(
+                slice(max(0, int(np.floor(c - r))), min(n, int(np.ceil(c + r)) + 1))
+                for c, n in zip((cy, cx), self.shape)
+            )
+            y, x = np.ogrid[slices]
+            mask = ((x - cx) ** 2 + (y - cy) ** 2) < r**2
+            return _nonempty(roi, self.shape, slices, np.flatnonzero(mask))
+
+        if isinstance(roi, PolygonROI):
+            vertices = np.asarray(roi.vertices, dtype=float)
+            low = np.floor(vertices.min(axis=0)).astype(int)
+            high = np.ceil(vertices.max(axis=0)).astype(int) + 1
+            slices = tuple(
+                slice(max(0, lo), min(n, hi))
+                for lo, hi, n in zip(low[::-1], high[::-1], self.shape)
+            )
+            y, x = np.mgrid[slices]
+            points = np.stack([x.ravel(), y.ravel()], axis=-1)
+            index = np.flatnonzero(Path(vertices).contains_points(points))
+            return _nonempty(roi, self.shape, slices, index)
+
+        if isinstance(roi, np.ndarray):
+            if label is not None or roi.dtype == bool:
+                if roi.shape != self.shape:
+                    raise ValueError(
+                        f"Expected a mask or label image of shape {self.shape}, "
+                        f"got {roi.shape}"
+                    )
+                coords = np.nonzero(roi if label is None else roi == label)
+            else:
+                coords = np.unravel_index(roi.reshape(-1), self.shape)
+            if not coords[0].size:
+                raise ValueError("The region of interest contains no pixels")
+            low = [c.min() for c in coords]
+            high = [c.max() + 1 for c in coords]
+            index = np.ravel_multi_index(
+                [c - lo for c, lo in zip(coords, low)],
+                [hi - lo for lo, hi in zip(low, high)],
+            )
+            return tuple(slice(lo, hi) for lo, hi in zip(low, high)), index
+
+        raise NotImplementedError(
+            "Supported ROIs are RectangularROI, CircleROI and PolygonROI, "
+            "boolean masks, label images and flat pixel indices"
+        )
+
+    def find_tilt_angles_regions(
+        self,
+        regions: list[BaseROI] | np.ndarray,
+        zone_axis: Miller,
+        degrees: bool = True,
+        use_mean_orientation: bool = False,
+        workers: int = 1,
+        background: int | None = 0,
+        global_search: bool = False,
+        resolution: float = 5.0,
+        n_seeds: int = 4,
+        method: str = None,
+    ) -> np.ndarray:
+        """Calculate the tilt angles necessary to align each of several regions of the sample
+        with a given optical axis, as :meth:`crop` followed by :meth:`find_tilt_angles` would
+        for each region. The regions are solved in a pool of processes, which read the
+        orientations from shared memory instead of receiving copies.
+
+        Array-like data is read into shared memory. As with any use of multiprocessing,
+        scripts using several processes must guard their entry point with
+        :code:`if __name__ == "__main__":`.
+
+        :param regions: Hyperspy ROIs, or a label image with the shape of the sample
+        :type regions: list[BaseROI] | np.ndarray
+        :param zone_axis: The zone axis to align to
+        :type zone_axis: Miller
+        :param degrees: Whether to use degrees(True) or radians(False) for the angles and the residual, defaults to True
+        :type degrees: bool, optional
+        :param use_mean_orientation: Whether to perform optimization using the mean orientation of each region(True) or the mean angle with the zone axis(False), defaults to False
+        :type use_mean_orientation: bool, optional
+        :param workers: Number of processes. 1 solves the regions in this process, and -1 uses all available cores, defaults to 1
+        :type workers: int, optional
+        :param background: Label of the pixels that belong to no region in a label image. None uses every label, defaults to 0
+        :type background: int | None, optional
+        :param global_search: See :meth:`find_tilt_angles`, defaults to False
+        :type global_search: bool, optional
+        :param resolution: See :meth:`find_tilt_angles`, defaults to 5.0
+        :type resolution: float, optional
+        :param n_seeds: See :meth:`find_tilt_angles`, defaults to 4
+        :type n_seeds: int, optional
+        :param method: See :meth:`find_tilt_angles`, defaults to None
+        :type method: str, optional
+        :raises ValueError: If the label image does not have the shape of the sample
+        :raises NotImplementedError: If an unsupported ROI is supplied
+        :return: Table with one row per ROI, or per label in increasing order, and the fields
+            :code:`"region"` (the index of the ROI or the label), :code:`"n_pixels"`,
+            :code:`"angles"` and :code:`"residual"` (the misalignment score at the found angles)
+        :rtype: np.ndarray
+        """
+        if isinstance(regions, np.ndarray):
+            if regions.shape != self.shape:
+                raise ValueError(
+                    f"Expected a label image of shape {self.shape}, got {regions.shape}"
+                )
+            flat_labels = regions.reshape(-1)
+            order = np.argsort(flat_labels, kind="stable")
+            labels, starts = np.unique(flat_labels[order], return_index=True)
+            indices = np.split(order, starts[1:])
+            if background is not None:
+                keep = labels != background
+                indices = [index for index, k in zip(indices, keep) if k]
+                labels = labels[keep]
         else:
-            raise NotImplementedError("Supported ROIs are RectangularROI and CircleROI")
-        oris = self._original_rotations[slices]
-        axes = self.axes
-        return self.__class__(oris, self.phase, axes)
+            labels = np.arange(len(regions))
+            indices = [
+                _flat_index(self.shape, *self._crop_index(roi)).reshape(-1)
+                for roi in regions
+            ]
+
+        options = dict(
+            zone_axis=zone_axis,
+            degrees=degrees,
+            use_mean_orientation=use_mean_orientation,
+            global_search=global_search,
+            resolution=resolution,
+            n_seeds=n_seeds,
+            full_output=True,
+            method=method,
+        )
+        tasks = [(index, options) for index in indices]
+
+        quats = self._flat_quaternions()
+        if workers == 1:
+            # The module state is only set in pool workers, so that this process keeps
+            # no reference to the quaternions, and concurrent calls do not interfere
+            results = [
+                _solve_region(quats, self.phase, self.axes, index, options)
+                for index, options in tasks
+            ]
+        else:
+            if workers == -1:
+                workers = os.cpu_count()
+            shm = shared_memory.SharedMemory(create=True, size=max(1, quats.nbytes))
+            try:
+                np.ndarray(quats.shape, quats.dtype, buffer=shm.buf)[:] = quats
+                with ProcessPoolExecutor(
+                    max_workers=min(workers, max(1, len(tasks))),
+                    mp_context=_process_context(),
+                    initializer=_init_region_worker,
+                    initargs=(
+                        shm.name, self.phase, self.axes, quats.shape, quats.dtype
+                    ),
+                ) as pool:
+                    results = list(pool.map(_find_tilt_angles_region, tasks))
+            finally:
+                shm.close()
+                shm.unlink()
+
+        table = np.zeros(
+            len(tasks),
+            dtype=[
+                ("region", labels.dtype),
+                ("n_pixels", np.intp),
+                ("angles", float, len(self.axes)),
+                ("residual", float),
+            ],
+        )
+        table["region"] = labels
+        table["n_pixels"] = [len(index) for index in indices]
+        for row, res in zip(table, results):
+            # The mean angle with the zone axis is always optimized in degrees
+            residual = res.fun
+            if not (use_mean_orientation or degrees):
+                residual = np.deg2rad(residual)
+            row["angles"] = res.x
+            row["residual"] = residual
+        return table
+
+    def compress(self, tolerance: float = 1.0, degrees: bool = True) -> None:
+        """Group the orientations of the sample into grains, so that scores and tilt
+        angle searches scale with the number of grains instead of the number of pixels.
+
+        Pixels are assigned to the grain of a neighbouring pixel (left or above),
+        or of a recently found grain, if their misorientation with the first pixel
+        of that grain is within the tolerance. Each grain is represented by the mean
+        of its orientations, and weighted by its number of pixels. As both a pixel and
+        the mean are within the tolerance of the first pixel, the misorientation between
+        a pixel and the mean of its grain is at most twice the tolerance.
+
+        Array-like data is read into memory.
+
+        :param tolerance: Maximum misorientation between a pixel and the first pixel of its grain, defaults to 1.0
+        :type tolerance: float, optional
+        :param degrees: Whether the tolerance is in degrees(True) or radians(False), defaults to True
+        :type degrees: bool, optional
+        """
+        if degrees:
+            tolerance = np.deg2rad(tolerance)
+        quats = self._original_rotations.data
+        shape = quats.shape[:-1]
+        width = shape[-1] if len(shape) > 1 else 1
+        labels = np.empty(int(np.prod(shape)), dtype=np.intp)
+        symmetry = self.phase.point_group.proper_subgroup.data.reshape(-1, 4)
+        grains, weights = _jit_cluster(
+            quats.reshape(-1, 4), symmetry, np.cos(tolerance / 2), width, labels
+        )
+        self._grain_quaternions = grains.astype(self.dtype)
+        self._grain_labels = labels.reshape(shape)
+        self._grain_weights = weights
+
+    def decompress(self) -> None:
+        """Discard the grains found by :meth:`compress`, and work on every pixel again"""
+        self._grain_quaternions = None
+        self._grain_labels = None
+        self._grain_weights = None
+
+    @property
+    def grain_labels(self) -> np.ndarray | None:
+        """Index of the grain of each pixel, or None if the sample is not compressed"""
+        return self._grain_labels
+
+    @property
+    def grain_weights(self) -> np.ndarray | None:
+        """Number of pixels in each grain, or None if the sample is not compressed"""
+        return self._grain_weights
+
+    def _kernel_chunks(
+        self, use_mean_orientation: bool = False, report: TiltReport = None
+    ) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        """Iterate over the quaternions to evaluate scores on, with shape :code:`(n, 4)`,
+        and their weights. The weights are empty if all quaternions count equally.
+        """
+        if use_mean_orientation:
+            if report is not None:
+                cached = self._mean_quaternion is not None
+                report._count("cache_hits" if cached else "cache_misses")
+            mean = self._mean_rotation().data.reshape(-1, 4)
+            yield mean.astype(self.dtype), np.empty(0)
+        elif self._grain_quaternions is not None:
+            yield self._grain_quaternions, self._grain_weights
+        else:
+            for _, chunk in self._chunks():
+                yield chunk, np.empty(0)
 
     def find_tilt_angles(
         self,
         zone_axis: Miller,
         degrees: bool = True,
         use_mean_orientation: bool = False,
-    ) -> tuple[float, ...]:
+        workers: int = 1,
+        global_search: bool = False,
+        resolution: float = 5.0,
+        n_seeds: int = 4,
+        full_output: bool = False,
+        method: str = None,
+        callback: Callable[[np.ndarray, float], None] = None,
+        report: TiltReport = None,
+        subsample: int = None,
+        sampling: str = "stratified",
+        seed: int = None,
+        score: str | tuple[str, float] = "mean",
+    ) -> tuple[float, ...] | OptimizeResult:
         """Calculate the tilt angle(s) necessary to align the sample with a given optical axis
 
-        :param zone_axis: The zone axis to align to
+        With :code:`use_mean_orientation` and two tilt axes, the angles are found in closed
+        form, see :meth:`solve_tilt_angles`, unless a :code:`method`, :code:`global_search`
+        or :code:`callback` is given, or the zone axis is out of reach.
+
+        :param zone_axis: The zone axis to align to. Any of its symmetric equivalents is
+            aligned with, and the score is the angle to the equivalent in the fundamental sector
         :type zone_axis: Miller
         :param degrees: Whether to return degrees(True) or radians(False), defaults to True
         :type degrees: bool, optional
         :param use_mean_orientation: Whether to perform optimization using the mean orientation of the sample(True) or the mean angle with the zone axis(False), defaults to False
         :type use_mean_orientation: bool, optional
-        :return: Tilt angles
-        :rtype: tuple[float, ...]
+        :param workers: Number of threads used to evaluate the mean angle with the zone axis, or to refine the seeds of a global search. -1 uses all available cores, defaults to 1
+        :type workers: int, optional
+        :param global_search: Whether to score a coarse grid of tilt angles and refine the best points(True), or refine from the current angles only(False), defaults to False
+        :type global_search: bool, optional
+        :param resolution: Angular resolution of the coarse grid, in degrees, defaults to 5.0
+        :type resolution: float, optional
+        :param n_seeds: Number of best grid points to refine in a global search, defaults to 4
+        :type n_seeds: int, optional
+        :param full_output: Whether to return the full optimization result, including the score and the number of objective evaluations, defaults to False
+        :type full_output: bool, optional
+        :param method: Bounded scipy optimization method. The derivative-free methods "Nelder-Mead" and "Powell" use the score only, while "L-BFGS-B", "TNC", "SLSQP" and "trust-constr" use its analytical gradient. None uses "Nelder-Mead", or the closed form where it applies, defaults to None
+        :type method: str, optional
+        :param callback: Function called after every iteration of the optimizer, with the
+            current tilt angles and their score, in the unit given by :code:`degrees`.
+            In a global search, it is called from the threads refining the seeds, defaults to None
+        :type callback: Callable[[np.ndarray, float], None], optional
+        :param report: Report to add the time spent in each stage of the search and the
+            number of evaluations to. It is also attached to the full optimization result, defaults to None
+        :type report: TiltReport, optional
+        :param subsample: Number of pixels to start the search on. If given, the mean angle
+            is estimated on a subset of the pixels, which grows fourfold each time the
+            optimizer has converged on it, until refining on a new subset improves its score
+            by less than 0.01 degrees, or every pixel is used. The score of the final angles is then evaluated on every
+            pixel. The full result holds the subset estimate :code:`subsample_fun`, its
+            standard error :code:`score_error` and the subset size :code:`n_subsample`.
+            Defaults to None, which uses every pixel throughout
+        :type subsample: int, optional
+        :param sampling: How to pick the subset. "stratified" picks one random pixel from each
+            run of consecutive pixels in row-major order, and "random" picks pixels uniformly
+            at random, defaults to "stratified"
+        :type sampling: str, optional
+        :param seed: Seed of the random subset, defaults to None
+        :type seed: int, optional
+        :param score: Statistic of the angles between the optical axis and the zone axis to
+            minimize, see :meth:`angle_statistics`. Either "mean", "median",
+            :code:`("percentile", q)`, or :code:`("within", tolerance)`, which maximizes the
+            fraction of pixels within the tolerance in degrees. The median and percentiles
+            are less sensitive to outliers such as mis-indexed pixels than the mean.
+            These scores change in steps as pixels cross histogram bins or the tolerance, so
+            the local search on percentiles starts with steps of 1 degree. The fraction
+            within the tolerance is flat wherever no pixel is near the tolerance, and
+            requires :code:`global_search`, defaults to "mean"
+        :type score: str | tuple[str, float], optional
+        :raises ValueError: If an unsupported optimization method, sampling or score is given,
+            :code:`subsample` is combined with :code:`use_mean_orientation`, a score other
+            than the mean is combined with :code:`use_mean_orientation`, :code:`subsample`
+            or a gradient-based method, or :code:`("within", tolerance)` is used without
+            :code:`global_search`
+        :return: Tilt angles, or the optimization result if :code:`full_output` is True
+        :rtype: tuple[float, ...] | OptimizeResult
         """
+        start = time.perf_counter()
+        closed_form = (
+            use_mean_orientation
+            and len(self.axes) == 2
+            and method is None
+            and not global_search
+            and callback is None
+        )
+        if method is None:
+            method = "Nelder-Mead"
+        if method not in _DERIVATIVE_FREE_METHODS + _GRADIENT_METHODS:
+            raise ValueError(
+                f"Unsupported method {method!r}. "
+                f"Supported methods are {_DERIVATIVE_FREE_METHODS + _GRADIENT_METHODS}"
+            )
+        # The optical axis is reduced to the fundamental sector, so the closed form and
+        # every numerical search compare it with the zone axis in the sector as well
+        zone_axis = zone_axis.in_fundamental_sector()
+        kind, _ = _parse_score(score)
+        if kind != "mean":
+            if use_mean_orientation or subsample is not None:
+                raise ValueError(
+                    f"Score {score!r} requires `use_mean_orientation=False` "
+                    "and `subsample=None`"
+                )
+            if method in _GRADIENT_METHODS:
+                raise ValueError(
+                    f"Score {score!r} has no gradient. Use one of the methods "
+                    f"{_DERIVATIVE_FREE_METHODS}"
+                )
+            if kind == "within" and not global_search:
+                raise ValueError(f"Score {score!r} requires `global_search=True`")
+        if subsample is not None:
+            if use_mean_orientation:
+                raise ValueError("`subsample` requires `use_mean_orientation=False`")
+            if subsample < 1:
+                raise ValueError(f"`subsample` must be positive, got {subsample}")
+            if sampling not in _SAMPLING_METHODS:
+                raise ValueError(
+                    f"Unsupported sampling {sampling!r}. "
+                    f"Supported sampling methods are {_SAMPLING_METHODS}"
+                )
+        jac = method in _GRADIENT_METHODS
+
+        with _timed(report, "setup"):
+            if use_mean_orientation:
+                optimize = self._optimize_mean_orientation_func(
+                    zone_axis, degrees, jac, report
+                )
+            elif global_search:
+                # The threads are spent on refining the seeds in parallel
+                optimize = self._optimize_angle_with_func(
+                    zone_axis, degrees, jac=jac, report=report, score=score
+                )
+            else:
+                optimize = self._optimize_angle_with_func(
+                    zone_axis, degrees, workers, jac, report, score
+                )
+
+            res = None
+            if closed_form:
+                solutions = self.solve_tilt_angles(zone_axis, degrees=degrees)
+                if solutions.size:
+                    objective = self._optimize_mean_orientation_func(zone_axis, degrees)
+                    res = OptimizeResult(
+                        x=solutions[0],
+                        fun=objective(solutions[0]),
+                        nfev=1,
+                        success=True,
+                        message="Closed-form solution",
+                    )
+
+        if res is None and subsample is not None:
+            res = self._subsampled_search(
+                zone_axis,
+                degrees,
+                workers,
+                global_search,
+                resolution,
+                n_seeds,
+                method,
+                subsample,
+                np.random.default_rng(seed),
+                sampling,
+                callback,
+                report,
+            )
+        elif res is None and global_search:
+            res = self._global_search(
+                optimize,
+                zone_axis,
+                degrees,
+                use_mean_orientation,
+                workers,
+                resolution,
+                n_seeds,
+                method,
+                callback,
+                report,
+                score,
+            )
+        elif res is None:
+            angles = self.angles
+            if degrees:
+                angles = np.rad2deg(angles)
+            step = None
+            if kind != "mean":
+                # The scipy default simplex is too small to see the steps of the score
+                step = _PERCENTILE_STEP if degrees else np.deg2rad(_PERCENTILE_STEP)
+            res = self._refine(
+                optimize,
+                angles,
+                degrees,
+                step,
+                method=method,
+                callback=callback,
+                report=report,
+            )
 
-        if use_mean_orientation:
-            optimize = self._optimize_mean_orientation_func(zone_axis, degrees)
-        else:
-            optimize = self._optimize_angle_with_func(zone_axis, degrees)
+        if report is not None:
+            report._count("searches")
+            report._add_time("total", time.perf_counter() - start)
+            res.report = report
+        if full_output:
+            return res
+        return res.x
 
-        bounds = [(ax.min, ax.max) for ax in self.axes]
-        angles = self.angles
+    def _refine(
+        self,
+        optimize: Callable[[tuple[float, ...]], float | tuple[float, np.ndarray]],
+        angles: np.ndarray,
+        degrees: bool,
+        step: float = None,
+        method: str = "Nelder-Mead",
+        callback: Callable[[np.ndarray, float], None] = None,
+        report: TiltReport = None,
+    ) -> OptimizeResult:
+        """Run a bounded local optimization from the given angles
+
+        :param step: Size of the initial Nelder-Mead simplex, or of the initial Powell
+            directions, in the same unit as the angles. Defaults to the scipy default
+        :param method: Scipy optimization method. For gradient-based methods,
+            :code:`optimize` must return both the score and its gradient
+        :param callback: Function called after every iteration with the angles and score
+        :param report: Report to add the evaluations and the optimizer overhead to
+        """
+        start = time.perf_counter()
+        jac = method in _GRADIENT_METHODS
+        objective_time = 0.0
+        # Scores of the evaluated angles, to pass the score of each iterate on
+        scores = {}
+
+        def objective(angles: np.ndarray) -> float | tuple[float, np.ndarray]:
+            nonlocal objective_time
+            evaluation_start = time.perf_counter()
+            value = optimize(angles)
+            objective_time += time.perf_counter() - evaluation_start
+            if report is not None:
+                report._count("gradient_calls" if jac else "objective_calls")
+            if callback is not None:
+                scores[np.asarray(angles, dtype=float).tobytes()] = (
+                    value[0] if jac else value
+                )
+            return value
+
+        def iteration(angles: np.ndarray, *_) -> None:
+            if report is not None:
+                report._count("iterations")
+            if callback is not None:
+                angles = np.asarray(angles, dtype=float)
+                score = scores.get(angles.tobytes())
+                if score is None:
+                    score = objective(angles)
+                    score = score[0] if jac else score
+                callback(angles.copy(), float(score))
+
+        bounds = np.array([(ax.min, ax.max) for ax in self.axes])
         if degrees:
             bounds = np.rad2deg(bounds)
-            angles = np.rad2deg(angles)
+
+        options = {}
+        if step is not None and method == "Nelder-Mead":
+            simplex = np.tile(angles, (len(angles) + 1, 1))
+            for i in range(len(angles)):
+                # Step into the allowed range of each axis
+                direction = 1 if angles[i] + step <= bounds[i, 1] else -1
+                simplex[i + 1, i] += direction * step
+            options["initial_simplex"] = simplex
+        elif step is not None and method == "Powell":
+            options["direc"] = step * np.eye(len(angles))
 
         res = minimize(
-            optimize,
+            objective,
             angles,
+            jac=jac or None,
             bounds=bounds,
-            method="Nelder-Mead",
+            method=method,
+            callback=iteration if callback is not None or report is not None else None,
+            options=options,
         )
+        if report is not None:
+            elapsed = time.perf_counter() - start
+            report._add_time("optimizer", elapsed - objective_time)
+        return res
 
-        self.reset_rotation()
+    def _global_search(
+        self,
+        optimize: Callable[[tuple[float, ...]], float],
+        zone_axis: Miller,
+        degrees: bool,
+        use_mean_orientation: bool,
+        workers: int,
+        resolution: float,
+        n_seeds: int,
+        method: str = "Nelder-Mead",
+        callback: Callable[[np.ndarray, float], None] = None,
+        report: TiltReport = None,
+        score: str | tuple[str, float] = "mean",
+    ) -> OptimizeResult:
+        """Score a coarse grid of tilt angles in one batch, and refine the best grid points
+
+        :return: Best optimization result, with the number of objective evaluations of the whole search
+        :rtype: OptimizeResult
+        """
+        grid = self.tilt_grid(np.deg2rad(resolution))
+        scores = self._score_grid(
+            grid,
+            zone_axis,
+            use_mean_orientation,
+            workers=workers,
+            report=report,
+            score=score,
+        )
+        seeds, step = self._grid_seeds(grid, scores, degrees, resolution, n_seeds)
 
-        return res.x
+        def refine(seed: np.ndarray) -> OptimizeResult:
+            return self._refine(optimize, seed, degrees, step, method, callback, report)
+
+        results = _thread_map(refine, seeds, workers)
+        res = min(results, key=lambda r: r.fun)
+        res.nfev = scores.size + sum(r.nfev for r in results)
+        return res
+
+    def _subsampled_search(
+        self,
+        zone_axis: Miller,
+        degrees: bool,
+        workers: int,
+        global_search: bool,
+        resolution: float,
+        n_seeds: int,
+        method: str,
+        subsample: int,
+        rng: np.random.Generator,
+        sampling: str = "stratified",
+        callback: Callable[[np.ndarray, float], None] = None,
+        report: TiltReport = None,
+    ) -> OptimizeResult:
+        """Refine the tilt angles on growing subsets of the pixels, see :meth:`find_tilt_angles`
+
+        :return: Optimization result of the last subset, with the score of every pixel
+        :rtype: OptimizeResult
+        """
+        n_pixels = int(np.prod(self.shape))
+        # The mean angle with the zone axis is always scored in degrees
+        tolerance = 0.01
+        min_step = 0.1 if degrees else np.deg2rad(0.1)
+        jac = method in _GRADIENT_METHODS
+        angles = self.angles
+        if degrees:
+            angles = np.rad2deg(angles)
+
+        n = min(subsample, n_pixels)
+        step = None
+        previous = None
+        nfev = 0
+        while True:
+            if n < n_pixels:
+                # Gather the subset once, so that each evaluation costs the subset
+                # instead of a pass over the rows of the map
+                index = _subsample_index(n_pixels, n, sampling, rng)
+                quats = self.crop(index)._flat_quaternions()
+                subset = self.__class__(
+                    quats, self.phase, self.axes, self.chunk_size, dtype=self.dtype
+                )
+            else:
+                subset = self
+            optimize = subset._optimize_angle_with_func(
+                zone_axis, degrees, workers, jac, report
+            )
+            if global_search and step is None:
+                res = subset._global_search(
+                    optimize,
+                    zone_axis,
+                    degrees,
+                    False,
+                    workers,
+                    resolution,
+                    n_seeds,
+                    method,
+                    callback,
+                    report,
+                )
+                step = resolution / 2 if degrees else np.deg2rad(resolution / 2)
+            else:
+                res = self._refine(
+                    optimize, angles, degrees, step, method, callback, report
+                )
+                # The next simplex starts around the angles, at the scale they moved
+                step = max(2 * np.max(np.abs(res.x - angles)), min_step)
+            nfev += res.nfev
+
+            converged = False
+            if previous is not None:
+                # The previous angles were found on an independent subset, so this
+                # is an unbiased estimate of what the last refinement gained
+                score = optimize(previous)
+                nfev += 1
+                converged = (score[0] if jac else score) - res.fun < tolerance
+            previous = angles = res.x
+            if n == n_pixels or converged:
+                break
+            n = min(4 * n, n_pixels)
+
+        # Standard error of the mean of a sample drawn without replacement, in degrees
+        # like the score
+        pixel_scores = subset.angle_with_at(angles, zone_axis, degrees, workers)
+        if not degrees:
+            pixel_scores = np.rad2deg(pixel_scores)
+        error = np.std(pixel_scores) / np.sqrt(n) * np.sqrt(1 - n / n_pixels)
+        if subset is self:
+            full_score = res.fun
+        else:
+            full_score = self._optimize_angle_with_func(
+                zone_axis, degrees, workers, report=report
+            )(angles)
+            nfev += 1
+        res.subsample_fun = res.fun
+        res.score_error = error
+        res.n_subsample = n
+        res.fun = full_score
+        res.nfev = nfev
+        return res
+
+    def _grid_seeds(
+        self,
+        grid: list[np.ndarray],
+        scores: np.ndarray,
+        degrees: bool,
+        resolution: float,
+        n_seeds: int,
+    ) -> tuple[np.ndarray, float]:
+        """Tilt angles of the best scoring grid points, and the initial step size
+        for refining them, both in degrees or radians
+
+        :return: Seeds with shape :code:`(n_seeds, n_axes)`, and the step size
+        :rtype: tuple[np.ndarray, float]
+        """
+        best = np.unravel_index(np.argsort(scores, axis=None)[:n_seeds], scores.shape)
+        seeds = np.stack([angles[i] for angles, i in zip(grid, best)], axis=-1)
+        step = resolution / 2
+        if degrees:
+            seeds = np.rad2deg(seeds)
+        else:
+            step = np.deg2rad(step)
+        return seeds, step
+
+    def find_tilt_angles_many(
+        self,
+        zone_axes: Miller,
+        degrees: bool = True,
+        use_mean_orientation: bool = False,
+        workers: int = 1,
+        resolution: float = 5.0,
+        n_seeds: int = 4,
+        method: str = "Nelder-Mead",
+        tolerance: float = 1.0,
+    ) -> np.ndarray:
+        """Calculate the tilt angles necessary to align the sample with each of several zone axes.
+        The zone axes are scored together on a coarse grid of tilt angles, so each tilted
+        pixel is only computed once per grid point, and the best grid points of every zone
+        axis are then refined concurrently, as in :meth:`find_tilt_angles` with :code:`global_search`.
+        With :code:`use_mean_orientation` and two tilt axes, the closed-form solutions are used where they exist.
+
+        :param zone_axes: The zone axes to align to
+        :type zone_axes: Miller
+        :param degrees: Whether to use degrees(True) or radians(False) for the angles, the residual and the tolerance, defaults to True
+        :type degrees: bool, optional
+        :param use_mean_orientation: Whether to perform optimization using the mean orientation of the sample(True) or the mean angle with the zone axis(False), defaults to False
+        :type use_mean_orientation: bool, optional
+        :param workers: Number of threads used to score the grid and to refine the zone axes in parallel. -1 uses all available cores, defaults to 1
+        :type workers: int, optional
+        :param resolution: Angular resolution of the coarse grid, in degrees, defaults to 5.0
+        :type resolution: float, optional
+        :param n_seeds: Number of best grid points to refine for each zone axis, defaults to 4
+        :type n_seeds: int, optional
+        :param method: Bounded scipy optimization method, see :meth:`find_tilt_angles`, defaults to "Nelder-Mead"
+        :type method: str, optional
+        :param tolerance: Largest residual for which a zone axis is considered reachable, defaults to 1.0
+        :type tolerance: float, optional
+        :raises ValueError: If an unsupported optimization method is given
+        :return: Table with one row per zone axis, and the fields :code:`"zone_axis"` (uvw),
+            :code:`"angles"`, :code:`"residual"` (the misalignment score at the found angles,
+            with the symmetric equivalents of the zone axis) and :code:`"reachable"`
+        :rtype: np.ndarray
+        """
+        if method not in _DERIVATIVE_FREE_METHODS + _GRADIENT_METHODS:
+            raise ValueError(
+                f"Unsupported method {method!r}. "
+                f"Supported methods are {_DERIVATIVE_FREE_METHODS + _GRADIENT_METHODS}"
+            )
+        jac = method in _GRADIENT_METHODS
+        zone_axes = zone_axes.flatten()
+        table = np.zeros(
+            zone_axes.size,
+            dtype=[
+                ("zone_axis", float, 3),
+                ("angles", float, len(self.axes)),
+                ("residual", float),
+                ("reachable", bool),
+            ],
+        )
+        table["zone_axis"] = zone_axes.uvw
+        table["residual"] = np.inf
+        # The scores compare the optical axis in the fundamental sector with the zone
+        # axes, so any symmetric equivalent of a zone axis is aligned with
+        zone_axes = zone_axes.in_fundamental_sector()
+
+        remaining = np.arange(zone_axes.size)
+        if use_mean_orientation and len(self.axes) == 2:
+            for i in remaining:
+                solutions = self.solve_tilt_angles(zone_axes[i], degrees=degrees)
+                if solutions.size:
+                    score = self._optimize_mean_orientation_func(zone_axes[i], degrees)
+                    table["angles"][i] = solutions[0]
+                    table["residual"][i] = score(solutions[0])
+            remaining = remaining[np.isinf(table["residual"])]
+
+        tasks = []
+        if remaining.size:
+            grid = self.tilt_grid(np.deg2rad(resolution))
+            scores = self._score_grid(
+                grid, zone_axes[remaining], use_mean_orientation, workers=workers
+            ).reshape(*(len(angles) for angles in grid), remaining.size)
+        for j, i in enumerate(remaining):
+            if use_mean_orientation:
+                optimize = self._optimize_mean_orientation_func(
+                    zone_axes[i], degrees, jac
+                )
+            else:
+                optimize = self._optimize_angle_with_func(
+                    zone_axes[i], degrees, jac=jac
+                )
+            seeds, step = self._grid_seeds(
+                grid, scores[..., j], degrees, resolution, n_seeds
+            )
+            tasks += [(i, optimize, seed, step) for seed in seeds]
+
+        def refine(task) -> OptimizeResult:
+            _, optimize, seed, step = task
+            return self._refine(optimize, seed, degrees, step, method)
+
+        results = _thread_map(refine, tasks, workers)
+        for (i, *_), res in zip(tasks, results):
+            # The mean angle with the zone axis is always optimized in degrees
+            residual = res.fun
+            if not (use_mean_orientation or degrees):
+                residual = np.deg2rad(residual)
+            if residual < table["residual"][i]:
+                table["angles"][i] = res.x
+                table["residual"][i] = residual
+        table["reachable"] = table["residual"] <= tolerance
+        return table
+
+    def solve_tilt_angles(self, zone_axis: Miller, degrees: bool = True) -> np.ndarray:
+        """Calculate every set of tilt angles within the axis limits that aligns
+        the mean orientation of the sample with a given zone axis, or any of its
+        symmetric equivalents. The angles are found in closed form, which requires
+        exactly two non-parallel tilt axes, such as a standard double-tilt holder.
+
+        :param zone_axis: The zone axis to align to
+        :type zone_axis: Miller
+        :param degrees: Whether to return degrees(True) or radians(False), defaults to True
+        :type degrees: bool, optional
+        :raises NotImplementedError: If the sample holder does not have exactly two non-parallel axes
+        :return: Tilt angles with shape :code:`(M, 2)`, sorted by distance from the current angles.
+            :code:`M` is 0 if the zone axis is out of reach
+        :rtype: np.ndarray
+        """
+        o = self._mean_rotation()
+        equivalents = zone_axis.symmetrise(unique=True).unit
+        v = ~o * Vector3d(equivalents.data)
+        solutions = self.align_angles(
+            v, target=Vector3d(self.optical_axis.data), degrees=False
+        )
+        order = np.argsort(np.linalg.norm(solutions - self.angles, axis=-1))
+        solutions = solutions[order]
+        if degrees:
+            solutions = np.rad2deg(solutions)
+        return solutions
+
+    def tilt_solution_map(
+        self, zone_axis: Miller, degrees: bool = True, expand: bool = True
+    ) -> np.ndarray:
+        """Calculate, for every pixel or grain, the tilt angles that align its orientation
+        with a given zone axis or any of its symmetric equivalents. Of all solutions within
+        the axis limits, the one closest to the current angles is chosen. The angles are
+        found in closed form for all pixels at once, as in :meth:`solve_tilt_angles`,
+        which requires exactly two non-parallel tilt axes.
+
+        :param zone_axis: The zone axis to align to
+        :type zone_axis: Miller
+        :param degrees: Whether to return degrees(True) or radians(False), defaults to True
+        :type degrees: bool, optional
+        :param expand: For a compressed sample, whether to return the angles at every pixel(True) or of every grain(False), defaults to True
+        :type expand: bool, optional
+        :raises NotImplementedError: If the sample holder does not have exactly two non-parallel axes
+        :return: Tilt angles with shape :code:`(*shape, 2)`, in order of tilt axes.
+            NaN where the zone axis is out of reach
+        :rtype: np.ndarray
+        """
+        equivalents = zone_axis.symmetrise(unique=True).unit.data.reshape(-1, 3)
+        target = self.optical_axis.data.reshape(3)
+        reference = np.array(self.angles)
+
+        if self._grain_quaternions is not None:
+            chunks = [(slice(None), self._grain_quaternions)]
+            out = np.empty(self._grain_weights.shape + (len(self.axes),), self.dtype)
+        else:
+            chunks = self._chunks()
+            out = np.empty(self.shape + (len(self.axes),), self.dtype)
+        flat_out = out.reshape(-1, len(self.axes))
+
+        # Bound the intermediate arrays, which hold a few hundred bytes per equivalent
+        block = max(1, 2**16 // len(equivalents))
+        for index, quats in chunks:
+            chunk_out = flat_out[index]
+            for start in range(0, quats.shape[0], block):
+                # The zone axes in the sample frame, ~q * d
+                matrices = Rotation(quats[start : start + block]).to_matrix()
+                v = np.einsum("nji,ej->nei", matrices, equivalents)
+                chunk_out[start : start + block] = self._closest_align_angles(
+                    v, target, reference
+                )
+
+        if degrees:
+            out = np.rad2deg(out, out=out)
+        if self._grain_quaternions is not None and expand:
+            out = out[self._grain_labels]
+        return out
+
+    def reachable_zone_axes(
+        self,
+        zone_axes: Miller = None,
+        max_index: int = 3,
+        resolution: float = 1.0,
+        tolerance: float = None,
+        degrees: bool = True,
+    ) -> np.ndarray:
+        """List the zone axes that the mean orientation of the sample can be aligned with
+        within the limits of the tilt axes, ranked by the tilt needed to reach them.
+
+        The tilt range is sampled once, and the optical axis in the fundamental sector of the
+        crystal at every tilt state is put in a KD-tree, which is reused by later calls with
+        the same resolution. Each zone axis is then a lookup rather than an optimization.
+
+        :param zone_axes: Zone axes to look up. Defaults to every symmetrically distinct zone axis
+            with indices up to :code:`max_index`
+        :type zone_axes: Miller, optional
+        :param max_index: Largest absolute index of the enumerated zone axes, defaults to 3
+        :type max_index: int, optional
+        :param resolution: Angular resolution of the sampled tilt range, in degrees, defaults to 1.0
+        :type resolution: float, optional
+        :param tolerance: Largest misalignment for which a zone axis is reachable, defaults to :code:`resolution`
+        :type tolerance: float, optional
+        :param degrees: Whether to use degrees(True) or radians(False) for the tolerance and the returned angles, defaults to True
+        :type degrees: bool, optional
+        :return: Table with the fields :code:`"zone_axis"` (uvw), :code:`"angles"` (the sampled
+            tilt state closest to the current angles that reaches the zone axis), :code:`"tilt"`
+            (the distance between those angles and the current angles), :code:`"residual"`
+            (the misalignment at those angles) and :code:`"reachable"`.
+            If :code:`zone_axes` is given, there is one row per zone axis in the given order,
+            with NaN where it is out of reach. Otherwise only the reachable zone axes are listed,
+            sorted by tilt
+        :rtype: np.ndarray
+        """
+        if tolerance is None:
+            tolerance = resolution if degrees else np.deg2rad(resolution)
+        if degrees:
+            tolerance = np.deg2rad(tolerance)
+
+        if zone_axes is None:
+            candidates = Miller.from_highest_indices(self.phase, uvw=[max_index] * 3)
+            uvw = np.abs(candidates.uvw.round().astype(int))
+            candidates = candidates[np.gcd.reduce(uvw, axis=1) == 1]
+            candidates = candidates.unique(use_symmetry=True)
+        else:
+            candidates = zone_axes.flatten()
+
+        # Equivalent zone axes are found at the same point in the fundamental sector
+        points = candidates.in_fundamental_sector(self.phase.point_group).unit.data
+        if zone_axes is None:
+            _, first = np.unique(points.round(9), axis=0, return_index=True)
+            first.sort()
+            candidates, points = candidates[first], points[first]
+
+        states, tree = self._reachable_states(resolution)
+        tilts = np.linalg.norm(states - self.angles, axis=-1)
+        chord = 2 * np.sin(min(tolerance, np.pi) / 2)
+
+        table = np.zeros(
+            candidates.size,
+            dtype=[
+                ("zone_axis", float, 3),
+                ("angles", float, len(self.axes)),
+                ("tilt", float),
+                ("residual", float),
+                ("reachable", bool),
+            ],
+        )
+        table["zone_axis"] = candidates.uvw
+        table["angles"] = np.nan
+        table["tilt"] = np.nan
+        table["residual"] = np.nan
+        for i, neighbours in enumerate(tree.query_ball_point(points, chord)):
+            if not neighbours:
+                continue
+            best = neighbours[np.argmin(tilts[neighbours])]
+            distance = np.linalg.norm(tree.data[best] - points[i])
+            table["angles"][i] = states[best]
+            table["tilt"][i] = tilts[best]
+            table["residual"][i] = 2 * np.arcsin(min(distance / 2, 1.0))
+            table["reachable"][i] = True
+
+        if degrees:
+            for field in ("angles", "tilt", "residual"):
+                table[field] = np.rad2deg(table[field])
+        if zone_axes is None:
+            table = table[table["reachable"]]
+            table = table[np.argsort(table["tilt"], kind="stable")]
+        return table
+
+    def _reachable_states(self, resolution: float) -> tuple[np.ndarray, cKDTree]:
+        """Tilt states spanning the range of every axis, and a KD-tree of the optical axis
+        of the mean orientation in the fundamental sector at each state
+
+        :param resolution: Angular resolution of the tilt states, in degrees
+        :type resolution: float
+        :return: Tilt angles in radians with shape :code:`(N, n_axes)`, and the tree of
+            unit vectors with :code:`N` points
+        :rtype: tuple[np.ndarray, cKDTree]
+        """
+        if resolution not in self._reachability_index:
+            grid = self.tilt_grid(np.deg2rad(resolution))
+            states = np.stack(
+                [g.ravel() for g in np.meshgrid(*grid, indexing="ij")], axis=-1
+            )
+            holders = Rotation(self._quaternions_at(states))
+            v = self._mean_rotation() * (~holders * Vector3d(self.optical_axis.data))
+            v = Vector3d(v.data).in_fundamental_sector(self.phase.point_group)
+            self._reachability_index[resolution] = (states, cKDTree(v.unit.data))
+        return self._reachability_index[resolution]
 
     def plot(self) -> plt.Figure:
         """Plot IPF colormap of the orientations at the given tilt angle(s)
@@ -217,9 +1474,10 @@ class Sample(SampleHolder):
 
         def update(_):
             self.rotate_to(*[slider.val for slider in sliders], degrees=True)
-            x_im.set_data(ipfkey_x.orientation2color(self.orientations))
-            y_im.set_data(ipfkey_y.orientation2color(self.orientations))
-            z_im.set_data(ipfkey_z.orientation2color(self.orientations))
+            oris = self.orientations
+            x_im.set_data(ipfkey_x.orientation2color(oris))
+            y_im.set_data(ipfkey_y.orientation2color(oris))
+            z_im.set_data(ipfkey_z.orientation2color(oris))
             fig.canvas.draw_idle()
 
         for i, tilt_axis in enumerate(self.axes):
@@ -320,6 +1578,8 @@ class Sample(SampleHolder):
         zone_axis: Miller,
         resolution: float = 1.0,
         use_mean_orientation: bool = False,
+        workers: int = 1,
+        score: str | tuple[str, float] = "mean",
     ) -> plt.Figure:
         """Make a plot of similarity score as function of tilt angle(s).
 
@@ -329,48 +1589,44 @@ class Sample(SampleHolder):
         :type resolution: float, optional
         :param use_mean_orientation: Whether to perform optimization using the mean orientation of the sample(True) or the mean angle with the zone axis(False), defaults to False
         :type use_mean_orientation: bool, optional
+        :param workers: Number of threads used to evaluate the mean angle with the zone axis. -1 uses all available cores, defaults to 1
+        :type workers: int, optional
+        :param score: Statistic of the angles with the zone axis to plot, see :meth:`find_tilt_angles`, defaults to "mean"
+        :type score: str | tuple[str, float], optional
         :raises NotImplementedError: If more than 2 tilt axes are present, as up to 2 are supported
         :return: Line plot or colormap, depending on the number of tilt angles
         :rtype: plt.Figure
         """
 
-        if use_mean_orientation:
-            score = self._optimize_mean_orientation_func(zone_axis, degrees=True)
-        else:
-            score = self._optimize_angle_with_func(zone_axis, degrees=True)
+        if len(self.axes) > 2:
+            raise NotImplementedError(
+                "Only 1 and 2 tilt axes are supported for this plot"
+            )
+
+        scores = self.score_landscape(
+            zone_axis, resolution, use_mean_orientation, workers=workers, score=score
+        )
+        label = _score_label(score, zone_axis)
+        # The same grid as the scores, which are evaluated in radians
+        grid = self.tilt_grid(np.deg2rad(resolution))
+        grid = [np.rad2deg(angles) for angles in grid]
 
         if len(self.axes) == 1:
-            angles = np.arange(
-                np.rad2deg(self.axes[0].min), np.rad2deg(self.axes[0].max), resolution
-            )
-            scores = [score(angle) for angle in angles]
+            (angles,) = grid
 
             fig = plt.figure()
             ax = fig.add_subplot(1, 1, 1)
             ax.plot(angles, scores)
             ax.set_xlabel("Tilt angle [deg]")
-            ax.set_ylabel(
-                f"Mean angle with [{zone_axis.u} {zone_axis.v} {zone_axis.w}]"
-            )
+            ax.set_ylabel(label)
 
-        elif len(self.axes) == 2:
-            angles_1 = np.arange(
-                np.rad2deg(self.axes[0].min), np.rad2deg(self.axes[0].max), resolution
-            )
-            angles_2 = np.arange(
-                np.rad2deg(self.axes[1].min), np.rad2deg(self.axes[1].max), resolution
-            )
-            scores = [
-                score((angle_1, angle_2))
-                for angle_2 in angles_2
-                for angle_1 in angles_1
-            ]
-            scores = np.array(scores).reshape((angles_2.size, angles_1.size))
+        else:
+            angles_1, angles_2 = grid
 
             fig = plt.figure()
             ax = fig.add_subplot(1, 1, 1)
             im = ax.imshow(
-                scores,
+                scores.T,
                 extent=[
                     angles_1[0],
                     angles_1[-1],
@@ -380,14 +1636,103 @@ class Sample(SampleHolder):
             )
             ax.set_xlabel("1st tilt angle [deg]")
             ax.set_ylabel("2nd tilt angle")
-            fig.colorbar(im)
+            fig.colorbar(im, label=label)
+
+        return fig
+
+    def score_landscape(
+        self,
+        zone_axis: Miller,
+        resolution: float = 1.0,
+        use_mean_orientation: bool = False,
+        memory_limit: int = 2**28,
+        workers: int = 1,
+        score: str | tuple[str, float] = "mean",
+    ) -> np.ndarray:
+        """Calculate the similarity score on a grid spanning the range of every tilt axis.
+        The tilt angles of the grid are given by :meth:`tilt_grid`.
+
+        :param zone_axis: Zone axis to calculate for
+        :type zone_axis: Miller
+        :param resolution: Angular resolution of the tilt axes, in degrees, defaults to 1.0
+        :type resolution: float, optional
+        :param use_mean_orientation: Whether to score using the mean orientation of the sample(True) or the mean angle with the zone axis(False), defaults to False
+        :type use_mean_orientation: bool, optional
+        :param memory_limit: Approximate size in bytes of the intermediate arrays.
+            The grid is processed in chunks of tilt states that fit within it,
+            defaults to 256 MiB
+        :type memory_limit: int, optional
+        :param workers: Number of threads used to evaluate the mean angle with the zone axis. -1 uses all available cores, defaults to 1
+        :type workers: int, optional
+        :param score: Statistic of the angles with the zone axis, see :meth:`find_tilt_angles`, defaults to "mean"
+        :type score: str | tuple[str, float], optional
+        :return: Score in degrees, or the fraction of pixels outside the tolerance for
+            :code:`("within", tolerance)`, with one dimension per tilt axis, in order of tilt axes
+        :rtype: np.ndarray
+        """
+        grid = self.tilt_grid(np.deg2rad(resolution))
+        scores = self._score_grid(
+            grid, zone_axis, use_mean_orientation, memory_limit, workers, score=score
+        )
+        if _parse_score(score)[0] == "within":
+            return scores
+        return np.rad2deg(scores, out=scores)
 
+    def _score_grid(
+        self,
+        grid: list[np.ndarray],
+        zone_axis: Miller,
+        use_mean_orientation: bool,
+        memory_limit: int = 2**28,
+        workers: int = 1,
+        report: TiltReport = None,
+        score: str | tuple[str, float] = "mean",
+    ) -> np.ndarray:
+        """Score in radians, or as a fraction, at every combination of the given tilt
+        angles, evaluated in batches of tilt states
+
+        :return: Score with shape :code:`(len(grid[0]), len(grid[1]), ...)`,
+            with a trailing dimension of length :code:`zone_axis.size` if there
+            are several zone axes
+        :rtype: np.ndarray
+        :raises ValueError: If a score other than the mean is requested for
+            several zone axes, or with :code:`use_mean_orientation`
+        """
+        robust = _parse_score(score)[0] != "mean"
+        if robust and (zone_axis.size > 1 or use_mean_orientation):
+            raise ValueError(
+                f"Score {score!r} requires a single zone axis "
+                "and `use_mean_orientation=False`"
+            )
+        shape = tuple(len(angles) for angles in grid)
+        n_states = int(np.prod(shape))
+        if zone_axis.size == 1:
+            scores = np.empty(shape)
         else:
-            raise NotImplementedError(
-                "Only 1 and 2 tilt axes are supported for this plot"
+            scores = np.empty(shape + (zone_axis.size,))
+        flat_scores = scores.reshape(n_states, -1)
+
+        # Tilt angles, quaternions of each axis and their products, and two
+        # scores per zone axis for each state
+        bytes_per_state = 8 * (9 * len(grid) + 4 + 2 * zone_axis.size)
+        if robust:
+            bytes_per_state += 8 * _HISTOGRAM_BINS
+        chunk_size = max(1, memory_limit // bytes_per_state)
+        for start in range(0, n_states, chunk_size):
+            index = np.arange(start, min(start + chunk_size, n_states))
+            states = np.stack(
+                [angles[i] for angles, i in zip(grid, np.unravel_index(index, shape))],
+                axis=-1,
             )
-        self.reset_rotation()
-        return fig
+            if robust:
+                flat_scores[index, 0] = self._robust_score_at(
+                    states, zone_axis, score, workers, report
+                )
+            else:
+                flat_scores[index] = self._mean_angle_with_at(
+                    states, zone_axis, use_mean_orientation, workers, report
+                ).reshape(index.size, -1)
+        return scores
 
     def to_navigator(self) -> Signal1D:
         """Create a IPF-z colormap as a hyperspy signal
@@ -395,11 +1740,12 @@ class Sample(SampleHolder):
         :return: IPF-z
         :rtype: Signal1D
         """
-        ipfkey = IPFColorKeyTSL(
-            self.orientations.symmetry, direction=Vector3d.zvector()
-        )
+        from hyperspy.signals import Signal1D
 
-        float_rgb = ipfkey.orientation2color(self.orientations)
+        oris = self.orientations
+        ipfkey = IPFColorKeyTSL(oris.symmetry, direction=Vector3d.zvector())
+
+        float_rgb = ipfkey.orientation2color(oris)
         int_rgb = (float_rgb * 255).astype(np.uint8)
 
         s = Signal1D(int_rgb)
@@ -410,12 +1756,34 @@ class Sample(SampleHolder):
     def to_signal(self) -> Signal1D:
         """Hyperspy signal containing the quaternion data of the orientations at each sample point
 
+        For memory-mapped, HDF5 or Dask data, the signal is lazy.
+
         :return: Quaternion data
         :rtype: Signal1D
         """
-        return Signal1D(self.orientations.data)
+        from hyperspy.signals import LazySignal1D, Signal1D
+
+        if not self._streamed or self._index is not None:
+            return Signal1D(self.orientations.data)
+
+        if isinstance(self._quaternions, da.Array):
+            data = self._quaternions
+        else:
+            row_size = int(np.prod(self.shape[1:]))
+            rows = max(1, self.chunk_size // row_size)
+            data = da.from_array(
+                self._quaternions, chunks=(rows,) + self._quaternions.shape[1:]
+            )
+        conj = (~self._rotation).data.reshape(4)
+        return LazySignal1D(data.map_blocks(_tilt_quaternions, conj, dtype=float))
 
-    def angle_with(self, zone_axis: Miller, degrees: bool = True) -> np.ndarray:
+    def angle_with(
+        self,
+        zone_axis: Miller,
+        degrees: bool = True,
+        workers: int = 1,
+        expand: bool = True,
+    ) -> np.ndarray:
         """Calculate the angle between the optical axis and the target zone axis, 
         for all pixels in the sample.
 
@@ -423,14 +1791,143 @@ class Sample(SampleHolder):
         :type zone_axis: Miller
         :param degrees: Whether to return output in degrees(True) or radians(False), defaults to True
         :type degrees: bool, optional
+        :param workers: Number of threads to split the pixels between. -1 uses all available cores, defaults to 1
+        :type workers: int, optional
+        :param expand: For a compressed sample, whether to return the angle at every pixel(True) or of every grain(False), defaults to True
+        :type expand: bool, optional
+        :raises ValueError: If :code:`workers` is not a positive integer or -1
+        :return: Array of angles at all points in the sample
+        :rtype: np.ndarray
+        """
+        holder = self._rotation.data.reshape(4)
+        return self._angle_with_holder(holder, zone_axis, degrees, workers, expand)
+
+    def angle_with_at(
+        self,
+        angles: tuple[float, ...],
+        zone_axis: Miller,
+        degrees: bool = True,
+        workers: int = 1,
+        expand: bool = True,
+    ) -> np.ndarray:
+        """Calculate the angle between the optical axis and the target zone axis,
+        for all pixels in the sample at the given tilt angles.
+        The tilt angles of the sample holder are not changed, so this is safe to call
+        from several threads at once.
+
+        :param angles: Tilt angles, in order of tilt axes
+        :type angles: tuple[float, ...]
+        :param zone_axis: Zone axis to calculate for
+        :type zone_axis: Miller
+        :param degrees: Whether the tilt angles and the output are in degrees(True) or radians(False), defaults to True
+        :type degrees: bool, optional
+        :param workers: Number of threads to split the pixels between. -1 uses all available cores, defaults to 1
+        :type workers: int, optional
+        :param expand: For a compressed sample, whether to return the angle at every pixel(True) or of every grain(False), defaults to True
+        :type expand: bool, optional
+        :raises ValueError: If :code:`workers` is not a positive integer or -1, or the angles do not match the tilt axes
+        :raises IndexError: If any angle is out of range for its axis
         :return: Array of angles at all points in the sample
         :rtype: np.ndarray
         """
-        vecs = (self.orientations * self.optical_axis).in_fundamental_sector()
-        angles = _jit_angle_with(vecs.data, zone_axis.data)
+        angles = np.asarray(angles, dtype=float)
         if degrees:
-            angles = np.rad2deg(angles)
-        return angles
+            angles = np.deg2rad(angles)
+        holder = self._quaternions_at(angles.reshape(1, -1))[0]
+        return self._angle_with_holder(holder, zone_axis, degrees, workers, expand)
+
+    def angle_statistics(
+        self,
+        zone_axis: Miller,
+        angles: tuple[float, ...] = None,
+        percentiles: tuple[float, ...] = (5, 25, 50, 75, 95),
+        tolerance: float = 1.0,
+        degrees: bool = True,
+        workers: int = 1,
+    ) -> dict[str, float | np.ndarray]:
+        """Summary statistics of the angle between the optical axis and the zone axis
+        over all pixels, computed in one pass over the pixels without sorting them.
+
+        The median and percentiles are interpolated in a histogram with bins of 0.01 degrees,
+        so that array-like data is streamed in chunks like for the mean. They invert the
+        weighted cumulative distribution of the angles, with the angles spread evenly within
+        each bin, and are within a bin of :code:`np.percentile(..., method="inverted_cdf")`.
+        The 0th and 100th percentiles are the smallest and largest angle. Compressed samples
+        weight each grain by its number of pixels.
+
+        :param zone_axis: Zone axis to calculate for
+        :type zone_axis: Miller
+        :param angles: Tilt angles to evaluate at, defaults to the current tilt angles
+        :type angles: tuple[float, ...], optional
+        :param percentiles: Percentiles to compute, between 0 and 100, defaults to (5, 25, 50, 75, 95)
+        :type percentiles: tuple[float, ...], optional
+        :param tolerance: Largest angle for a pixel to count as aligned, defaults to 1.0
+        :type tolerance: float, optional
+        :param degrees: Whether the angles, tolerance and results are in degrees(True) or radians(False), defaults to True
+        :type degrees: bool, optional
+        :param workers: Number of threads to split the pixels between. -1 uses all available cores, defaults to 1
+        :type workers: int, optional
+        :raises IndexError: If any angle is out of range for its axis
+        :return: Dictionary with the :code:`"mean"`, :code:`"std"`, :code:`"median"`, the
+            :code:`"percentiles"` in the order given, the fraction of pixels within the
+            tolerance :code:`"within"`, and the number of pixels :code:`"n_pixels"`
+        :rtype: dict[str, float | np.ndarray]
+        """
+        if angles is None:
+            angles = self.angles
+        elif degrees:
+            angles = np.deg2rad(angles)
+        if degrees:
+            tolerance = np.deg2rad(tolerance)
+        hist, within, sums, extremes, total_weight = self._angle_histogram_at(
+            np.reshape(angles, (1, -1)), zone_axis, tolerance, workers
+        )
+        mean = sums[0, 0] / total_weight
+        std = np.sqrt(max(sums[0, 1] / total_weight - mean**2, 0.0))
+        values = _histogram_percentiles(hist[0], [*percentiles, 50], extremes[0])
+        convert = np.rad2deg if degrees else np.asarray
+        return {
+            "mean": float(convert(mean)),
+            "std": float(convert(std)),
+            "median": float(convert(values[-1])),
+            "percentiles": convert(values[:-1]),
+            "within": within[0] / total_weight,
+            "n_pixels": total_weight,
+        }
+
+    def _angle_with_holder(
+        self,
+        holder: np.ndarray,
+        zone_axis: Miller,
+        degrees: bool,
+        workers: int,
+        expand: bool,
+    ) -> np.ndarray:
+        """Angle with the zone axis for all pixels, at the holder rotation
+        given by the quaternion :code:`holder` with shape :code:`(4,)`"""
+        if self._grain_quaternions is not None:
+            chunks = [(slice(None), self._grain_quaternions)]
+            out = np.empty(self._grain_weights.shape, dtype=self.dtype)
+        else:
+            chunks = self._chunks()
+            out = np.empty(self.shape, dtype=self.dtype)
+        flat_out = out.reshape(-1)
+        with _num_threads(workers):
+            kernel = _jit_angle_with if workers == 1 else _jit_angle_with_parallel
+            for index, quats in chunks:
+                kernel(
+                    quats,
+                    holder.astype(self.dtype),
+                    self._optical_axis_data,
+                    *self._symmetry,
+                    zone_axis.data.reshape(3).astype(self.dtype),
+                    flat_out[index],
+                )
+        if degrees:
+            out = np.rad2deg(out, out=out)
+        if self._grain_quaternions is not None and expand:
+            out = out[self._grain_labels]
+        return out
 
     def mean_zone_axis(self) -> Miller:
         """Calculate the mean orientation in the sample, and return the zone axis.
@@ -439,36 +1936,851 @@ class Sample(SampleHolder):
         :return: Zone axis
         :rtype: Miller
         """
-        return (self.orientations.mean() * self.optical_axis_miller).round()
+        # The mean is computed in chunks, and tilted like the orientations
+        holder = Rotation(self._quaternions_at(np.reshape(self.angles, (1, -1))))
+        mean = Orientation(
+            (self._mean_rotation() * ~holder).data, symmetry=self.phase.point_group
+        )
+        return (mean * self.optical_axis_miller).round()
 
-    def _optimize_angle_with_func(
-        self, zone_axis: Miller, degrees: bool
-    ) -> Callable[[tuple[float, ...]], float]:
-        def optimize(angles) -> float:
-            self.rotate_to(angles, degrees=degrees)
-            aw = self.angle_with(zone_axis)
-            return np.mean(aw)
+    def _mean_angle_with_at(
+        self,
+        angles: np.ndarray,
+        zone_axis: Miller,
+        use_mean_orientation: bool = False,
+        workers: int = 1,
+        report: TiltReport = None,
+    ) -> np.ndarray:
+        """Mean angle between the optical axis and one or more zone axes at many tilt states,
+        in one batch and without changing the current tilt angles
+
+        :param angles: Tilt angles in radians, with shape :code:`(N, n_axes)`
+        :type angles: np.ndarray
+        :param zone_axis: Zone axis to calculate for. If it holds several zone axes,
+            they are all scored against the same tilted optical axes
+        :type zone_axis: Miller
+        :param use_mean_orientation: Whether to use the mean orientation of the sample(True) or all pixels(False), defaults to False
+        :type use_mean_orientation: bool, optional
+        :param workers: Number of threads to split the pixels between. -1 uses all available cores, defaults to 1
+        :type workers: int, optional
+        :param report: Report to add the time spent and the number of evaluations to, defaults to None
+        :type report: TiltReport, optional
+        :return: Mean angles in radians, with shape :code:`(N,)` for a single zone axis,
+            or :code:`(N, zone_axis.size)` otherwise
+        :rtype: np.ndarray
+        """
+        with _timed(report, "holder"):
+            holders = self._quaternions_at(angles).astype(self.dtype)
+        targets = zone_axis.data.reshape(-1, 3).astype(self.dtype)
+        scores = np.zeros((holders.shape[0], targets.shape[0]))
+        chunk_scores = np.empty_like(scores)
+        total_weight = 0
+        start = time.perf_counter()
+        kernel_time = 0.0
+        with _num_threads(workers):
+            if workers == 1:
+                kernel = _jit_mean_angle_with
+            else:
+                kernel = _jit_mean_angle_with_parallel
+            for quats, weights in self._kernel_chunks(use_mean_orientation, report):
+                n_blocks = max(1, min(quats.shape[0], 4 * numba.get_num_threads()))
+                kernel_start = time.perf_counter()
+                kernel(
+                    quats,
+                    weights,
+                    holders,
+                    self._optical_axis_data,
+                    *self._symmetry,
+                    targets,
+                    np.empty((n_blocks, targets.shape[0])),
+                    chunk_scores,
+                )
+                kernel_time += time.perf_counter() - kernel_start
+                chunk_weight = weights.sum() if weights.size else quats.shape[0]
+                scores += chunk_scores * chunk_weight
+                total_weight += chunk_weight
+                if report is not None:
+                    report._count("pixel_evaluations", len(quats) * len(holders))
+        if report is not None:
+            report._add_time("kernel", kernel_time)
+            report._add_time("read", time.perf_counter() - start - kernel_time)
+            report._count("tilt_states", len(holders))
+        scores /= total_weight
+        if zone_axis.size == 1:
+            return scores[:, 0]
+        return scores
+
+    def _mean_angle_with_gradient_at(
+        self,
+        angles: np.ndarray,
+        zone_axis: Miller,
+        use_mean_orientation: bool = False,
+        workers: int = 1,
+        report: TiltReport = None,
+    ) -> tuple[float, np.ndarray]:
+        """Mean angle between the optical axis and the zone axis at one tilt state,
+        and its gradient with respect to the tilt angles
+
+        :param angles: Tilt angles in radians, with shape :code:`(n_axes,)`
+        :type angles: np.ndarray
+        :param zone_axis: Zone axis to calculate for
+        :type zone_axis: Miller
+        :param use_mean_orientation: Whether to use the mean orientation of the sample(True) or all pixels(False), defaults to False
+        :type use_mean_orientation: bool, optional
+        :param workers: Number of threads to split the pixels between. -1 uses all available cores, defaults to 1
+        :type workers: int, optional
+        :param report: Report to add the time spent and the number of evaluations to, defaults to None
+        :type report: TiltReport, optional
+        :return: Mean angle in radians, and its gradient with shape :code:`(n_axes,)`
+        :rtype: tuple[float, np.ndarray]
+        """
+        with _timed(report, "holder"):
+            self._check_angle_array(np.reshape(angles, (1, -1)))
+            w, dws = self._TEM_frame_to_sample_frame_jacobian(
+                angles, self.optical_axis.data.reshape(3)
+            )
 
-        return optimize
+        score = 0.0
+        grad = np.zeros(len(self.axes))
+        total_weight = 0
+        start = time.perf_counter()
+        kernel_time = 0.0
+        with _num_threads(workers):
+            if workers == 1:
+                kernel = _jit_mean_angle_with_gradient
+            else:
+                kernel = _jit_mean_angle_with_gradient_parallel
+            for quats, weights in self._kernel_chunks(use_mean_orientation, report):
+                n_blocks = max(1, min(quats.shape[0], 4 * numba.get_num_threads()))
+                scores = np.zeros(n_blocks)
+                grads = np.zeros((n_blocks, len(self.axes)))
+                kernel_start = time.perf_counter()
+                kernel(
+                    quats,
+                    weights,
+                    w.astype(self.dtype),
+                    dws.astype(self.dtype),
+                    *self._symmetry,
+                    zone_axis.data.reshape(3).astype(self.dtype),
+                    scores,
+                    grads,
+                )
+                kernel_time += time.perf_counter() - kernel_start
+                score += scores.sum()
+                grad += grads.sum(axis=0)
+                total_weight += weights.sum() if weights.size else quats.shape[0]
+                if report is not None:
+                    report._count("pixel_evaluations", len(quats))
+        if report is not None:
+            report._add_time("kernel", kernel_time)
+            report._add_time("read", time.perf_counter() - start - kernel_time)
+            report._count("tilt_states")
+        return score / total_weight, grad / total_weight
+
+    def _angle_histogram_at(
+        self,
+        angles: np.ndarray,
+        zone_axis: Miller,
+        tolerance: float,
+        workers: int = 1,
+        report: TiltReport = None,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, float]:
+        """Histograms, moments and extremes of the angle with the zone axis at many tilt
+        states, in one pass over the pixels
+
+        :param angles: Tilt angles in radians, with shape :code:`(N, n_axes)`
+        :type angles: np.ndarray
+        :param tolerance: Largest angle in radians counted as within the tolerance
+        :type tolerance: float
+        :return: Weighted histograms with shape :code:`(N, _HISTOGRAM_BINS)` spanning 0 to pi,
+            the weight within the tolerance with shape :code:`(N,)`, the weighted sums of the
+            angles and their squares with shape :code:`(N, 2)`, the smallest and largest angle
+            with shape :code:`(N, 2)`, and the total weight
+        :rtype: tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, float]
+        """
+        with _timed(report, "holder"):
+            holders = self._quaternions_at(angles).astype(self.dtype)
+        target = zone_axis.data.reshape(3).astype(self.dtype)
+        hist = np.zeros((len(holders), _HISTOGRAM_BINS))
+        within = np.zeros(len(holders))
+        sums = np.zeros((len(holders), 2))
+        extremes = np.tile([np.inf, -np.inf], (len(holders), 1))
+        total_weight = 0
+        scale = _HISTOGRAM_BINS / np.pi
+        with _num_threads(workers):
+            kernel = _jit_angle_with if workers == 1 else _jit_angle_with_parallel
+            for quats, weights in self._kernel_chunks(report=report):
+                weights = weights if weights.size else np.ones(len(quats))
+                out = np.empty(len(quats), dtype=self.dtype)
+                for m, holder in enumerate(holders):
+                    with _timed(report, "kernel"):
+                        kernel(
+                            quats,
+                            holder,
+                            self._optical_axis_data,
+                            *self._symmetry,
+                            target,
+                            out,
+                        )
+                    index = np.minimum((out * scale).astype(np.intp), len(hist[m]) - 1)
+                    hist[m] += np.bincount(index, weights, minlength=len(hist[m]))
+                    within[m] += weights[out <= tolerance].sum()
+                    sums[m, 0] += weights @ out.astype(float)
+                    sums[m, 1] += weights @ np.square(out, dtype=float)
+                    extremes[m, 0] = min(extremes[m, 0], out.min(initial=np.inf))
+                    extremes[m, 1] = max(extremes[m, 1], out.max(initial=-np.inf))
+                total_weight += weights.sum()
+                if report is not None:
+                    report._count("pixel_evaluations", len(quats) * len(holders))
+        if report is not None:
+            report._count("tilt_states", len(holders))
+        return hist, within, sums, extremes, total_weight
+
+    def _robust_score_at(
+        self,
+        angles: np.ndarray,
+        zone_axis: Miller,
+        score: str | tuple[str, float],
+        workers: int = 1,
+        report: TiltReport = None,
+    ) -> np.ndarray:
+        """Percentile of the angle with the zone axis in radians, or the fraction of pixels
+        outside the tolerance, at many tilt states
+
+        :param angles: Tilt angles in radians, with shape :code:`(N, n_axes)`
+        :type angles: np.ndarray
+        :param score: Score, see :meth:`find_tilt_angles`
+        :type score: str | tuple[str, float]
+        :return: Scores with shape :code:`(N,)`
+        :rtype: np.ndarray
+        """
+        kind, value = _parse_score(score)
+        tolerance = value if kind == "within" else 0.0
+        hist, within, _, extremes, total_weight = self._angle_histogram_at(
+            angles, zone_axis, tolerance, workers, report
+        )
+        if kind == "within":
+            return 1 - within / total_weight
+        return _histogram_percentiles(hist, value, extremes)[:, 0]
 
-    def _optimize_mean_orientation_func(
-        self, zone_axis: Miller, degrees: bool
-    ) -> Callable[[tuple[float, ...]], float]:
-        o = self._original_rotations.mean()
+    def _optimize_angle_with_func(
+        self,
+        zone_axis: Miller,
+        degrees: bool,
+        workers: int = 1,
+        jac: bool = False,
+        report: TiltReport = None,
+        score: str | tuple[str, float] = "mean",
+    ) -> Callable[[tuple[float, ...]], float | tuple[float, np.ndarray]]:
+        kind, _ = _parse_score(score)
 
         def optimize(angles) -> float:
-            self.rotate_to(angles, degrees=degrees)
-            ro = o * ~self._rotation
-            mean_zone = (ro * self.optical_axis_miller).in_fundamental_sector()
-            return mean_zone.angle_with(zone_axis, degrees=degrees)
+            if degrees:
+                angles = np.deg2rad(angles)
+            if kind != "mean":
+                value = self._robust_score_at([angles], zone_axis, score, workers, report)
+                return value[0] if kind == "within" else np.rad2deg(value[0])
+            value = self._mean_angle_with_at(
+                [angles], zone_axis, workers=workers, report=report
+            )
+            return np.rad2deg(value[0])
 
-        return optimize
+        def optimize_with_gradient(angles) -> tuple[float, np.ndarray]:
+            if degrees:
+                angles = np.deg2rad(angles)
+            score, grad = self._mean_angle_with_gradient_at(
+                angles, zone_axis, workers=workers, report=report
+            )
+            # The score is in degrees, so the gradient is scaled with the angle unit
+            if not degrees:
+                grad = np.rad2deg(grad)
+            return np.rad2deg(score), grad
 
+        return optimize_with_gradient if jac else optimize
 
-@njit
-def _jit_angle_with(vecs, target):
-    dot = np.sum(vecs * target, axis=-1)
+    def _optimize_mean_orientation_func(
+        self,
+        zone_axis: Miller,
+        degrees: bool,
+        jac: bool = False,
+        report: TiltReport = None,
+    ) -> Callable[[tuple[float, ...]], float | tuple[float, np.ndarray]]:
+        def optimize(angles) -> float:
+            if degrees:
+                angles = np.deg2rad(angles)
+            score = self._mean_angle_with_at(
+                [angles], zone_axis, True, report=report
+            )[0]
+            if degrees:
+                score = np.rad2deg(score)
+            return score
+
+        def optimize_with_gradient(angles) -> tuple[float, np.ndarray]:
+            # The score and angles have the same unit, so the gradient is unit-free
+            if degrees:
+                angles = np.deg2rad(angles)
+            score, grad = self._mean_angle_with_gradient_at(
+                angles, zone_axis, True, report=report
+            )
+            if degrees:
+                score = np.rad2deg(score)
+            return score, grad
+
+        return optimize_with_gradient if jac else optimize
+
+
+def warmup(dtypes: tuple[type, ...] = (np.float32, np.float64)) -> None:
+    """Compile the Numba kernels ahead of time, in their serial and parallel variants.
+
+    The compiled kernels are cached on disk, so later processes, such as the workers of
+    :meth:`Sample.find_tilt_angles_regions`, load them instead of compiling them again.
+    The cache is kept next to the package, or in the directory given by the
+    :code:`NUMBA_CACHE_DIR` environment variable.
+
+    :param dtypes: Floating point types of the samples to compile for, defaults to
+        (np.float32, np.float64)
+    :type dtypes: tuple[type, ...], optional
+    """
+    phase = Phase(point_group="m-3m")
+    axes = [
+        Axis(Vector3d.xvector(), -30, 30),
+        Axis(Vector3d.yvector(), -30, 30, intrinsic=True),
+    ]
+    quats = Rotation.random((2, 3)).data
+    zone_axis = Miller(uvw=[0, 0, 1], phase=phase)
+    angles = np.zeros((1, len(axes)))
+    for dtype in dtypes:
+        sample = Sample(quats, phase, axes, dtype=dtype)
+        for compressed in (False, True):
+            if compressed:
+                sample.compress()
+            for workers in (1, 2):
+                sample.angle_with(zone_axis, workers=workers)
+                sample._mean_angle_with_at(angles, zone_axis, workers=workers)
+                sample._mean_angle_with_gradient_at(
+                    angles[0], zone_axis, workers=workers
+                )
+
+
+def _tilt_quaternions(quats: np.ndarray, conj: np.ndarray) -> np.ndarray:
+    """Normalize quaternions, and apply the inverse holder rotation :code:`conj`"""
+    quats = quats / np.linalg.norm(quats, axis=-1, keepdims=True)
+    return _quaternion_multiply(quats, conj)
+
+
+def _parse_score(score: str | tuple[str, float]) -> tuple[str, float | None]:
+    """Kind and parameter of a score, as :code:`("mean", None)`,
+    :code:`("percentile", q)` or :code:`("within", tolerance in radians)`
+
+    :raises ValueError: If the score is not supported
+    """
+    if isinstance(score, str):
+        if score == "mean":
+            return "mean", None
+        if score == "median":
+            return "percentile", 50.0
+    elif isinstance(score, tuple) and len(score) == 2:
+        kind, value = score
+        if kind == "percentile" and 0 <= value <= 100:
+            return kind, float(value)
+        if kind == "within" and value > 0:
+            return kind, float(np.deg2rad(value))
+    raise ValueError(
+        f"Unsupported score {score!r}. Supported scores are 'mean', 'median', "
+        "('percentile', q) with 0 <= q <= 100, and ('within', degrees)"
+    )
+
+
+def _score_label(score: str | tuple[str, float], zone_axis: Miller) -> str:
+    """Axis label of a score"""
+    uvw = f"[{zone_axis.u} {zone_axis.v} {zone_axis.w}]"
+    kind, value = _parse_score(score)
+    if kind == "mean":
+        return f"Mean angle with {uvw}"
+    if kind == "within":
+        return f"Fraction of pixels more than {np.rad2deg(value):g}° from {uvw}"
+    if value == 50:
+        return f"Median angle with {uvw}"
+    return f"{value:g}th percentile of the angle with {uvw}"
+
+
+def _histogram_percentiles(
+    hist: np.ndarray, q: list[float], extremes: np.ndarray
+) -> np.ndarray:
+    """Percentiles in radians of angles counted in histograms spanning 0 to pi.
+    The weighted cumulative distribution is inverted with the angles spread evenly
+    within each bin, and clamped to the smallest and largest angle, so that the result
+    is within a bin of the :code:`"inverted_cdf"` percentile of the angles
+
+    :param hist: Histograms, with shape :code:`(..., n_bins)`
+    :type hist: np.ndarray
+    :param q: Percentiles, between 0 and 100
+    :type q: list[float]
+    :param extremes: Smallest and largest angle of each histogram, with shape :code:`(..., 2)`
+    :type extremes: np.ndarray
+    :return: Percentiles with shape :code:`(..., len(q))`
+    :rtype: np.ndarray
+    """
+    width = np.pi / hist.shape[-1]
+    cumulative = np.cumsum(hist, axis=-1).reshape(-1, hist.shape[-1])
+    targets = cumulative[:, -1:] * (np.atleast_1d(q) / 100)
+    out = np.empty(targets.shape)
+    for i, (counts, target) in enumerate(zip(cumulative, targets)):
+        # First bin whose cumulative count reaches the target
+        index = np.minimum(np.searchsorted(counts, target), len(counts) - 1)
+        before = np.where(index > 0, counts[index - 1], 0.0)
+        in_bin = counts[index] - before
+        fraction = np.divide(
+            target - before, in_bin, out=np.zeros_like(target), where=in_bin > 0
+        )
+        out[i] = (index + fraction) * width
+    extremes = np.reshape(extremes, (-1, 2))
+    out = np.clip(out, extremes[:, :1], extremes[:, 1:])
+    return out.reshape(hist.shape[:-1] + (len(targets[0]),))
+
+
+def _nonempty(
+    roi: BaseROI,
+    shape: tuple[int, ...],
+    slices: tuple[slice, ...],
+    index: np.ndarray | None,
+) -> tuple[tuple[slice, ...], np.ndarray | None]:
+    """Pass on the bounding box and indices of a region of interest, see
+    :meth:`Sample._crop_index`
+
+    :raises ValueError: If the region of interest contains no pixels of the sample
+    """
+    if index is None:
+        size = np.prod([len(range(*s.indices(n))) for s, n in zip(slices, shape)])
+    else:
+        size = index.size
+    if not size:
+        raise ValueError(f"The region of interest {roi} contains no pixels")
+    return slices, index
+
+
+def _subsample_index(
+    n_pixels: int, n: int, sampling: str, rng: np.random.Generator
+) -> np.ndarray:
+    """Sorted flat indices of :code:`n` distinct pixels out of :code:`n_pixels`,
+    one from each run of consecutive pixels if :code:`sampling` is "stratified",
+    or uniformly at random if it is "random"
+    """
+    if sampling == "random":
+        return np.sort(rng.choice(n_pixels, n, replace=False))
+    edges = np.arange(n + 1) * n_pixels // n
+    return edges[:-1] + (rng.random(n) * np.diff(edges)).astype(np.intp)
+
+
+def _flat_index(
+    shape: tuple[int, ...], slices: tuple[slice, ...], index: np.ndarray | None
+) -> np.ndarray:
+    """Flat indices into an array of the given shape, of the pixels selected by a
+    bounding box and optional flat indices within it"""
+    ranges = [np.arange(*s.indices(n)) for s, n in zip(slices, shape)]
+    flat = np.ravel_multi_index(np.meshgrid(*ranges, indexing="ij"), shape)
+    if index is not None:
+        flat = flat.reshape(-1)[index]
+    return flat
+
+
+def _process_context() -> multiprocessing.context.BaseContext:
+    """Start method for worker processes. Forking a process that has started
+    the thread pool of the compiled kernels can deadlock, so fresh processes are used"""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+# Orientation data and holder of the sample whose regions are solved in this process
+_region_worker_state = {}
+
+
+def _init_region_worker(
+    name: str, phase: Phase, axes: list[Axis], shape: tuple, dtype: np.dtype
+) -> None:
+    """Set up a pool process to solve regions of a sample, with the quaternions
+    in the shared memory block of the given name, shape and dtype"""
+    shm = shared_memory.SharedMemory(name=name)
+    # Keep a reference, so the block is not closed while the process uses it
+    _region_worker_state["shm"] = shm
+    _region_worker_state["quats"] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    _region_worker_state["phase"] = phase
+    _region_worker_state["axes"] = axes
+
+
+def _find_tilt_angles_region(task: tuple[np.ndarray, dict]) -> OptimizeResult:
+    """Solve a region in a pool process set up by :func:`_init_region_worker`"""
+    index, options = task
+    state = _region_worker_state
+    return _solve_region(state["quats"], state["phase"], state["axes"], index, options)
+
+
+def _solve_region(
+    quats: np.ndarray,
+    phase: Phase,
+    axes: list[Axis],
+    index: np.ndarray,
+    options: dict,
+) -> OptimizeResult:
+    """Run :meth:`Sample.find_tilt_angles` on the pixels with the given flat indices"""
+    region = Sample(quats[index], phase, axes, dtype=quats.dtype)
+    return region.find_tilt_angles(**options)
+
+
+def _thread_map(func: Callable, items: list, workers: int) -> list:
+    """Apply :code:`func` to every item, in a thread pool if :code:`workers` is not 1.
+    -1 uses all available cores"""
+    if workers == 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    if workers == -1:
+        workers = numba.config.NUMBA_NUM_THREADS
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as pool:
+        return list(pool.map(func, items))
+
+
+def _symmetry_arrays(symmetry: Symmetry) -> tuple[np.ndarray, ...]:
+    """Precompute the data needed to project vectors to the fundamental sector of a point group
+    in a compiled kernel, following :meth:`orix.vector.Vector3d.in_fundamental_sector`.
+
+    :param symmetry: Point group of the sample
+    :type symmetry: Symmetry
+    :return: Pre-projection matrix (identity if unused), rotated sector centers,
+        inverse symmetry operations as matrices and sector normals
+    :rtype: tuple[np.ndarray, ...]
+    """
+    fs = symmetry.fundamental_sector
+    center = fs.center
+    basis = Vector3d(np.eye(3))
+    pre = np.eye(3)
+    if center.size == 0:
+        empty = np.zeros((0, 3))
+        return pre, empty, np.zeros((0, 3, 3)), empty
+
+    if symmetry.name in ["321", "312", "32", "-4"]:
+        pre = (symmetry[-1] * basis).data.T
+        S = symmetry[:3]
+    elif symmetry.name == "-3":
+        pre = (symmetry[3] * basis).data.T
+        S = symmetry[:3]
+    else:
+        S = symmetry
+
+    centers = (S * center).data.reshape(-1, 3)
+    inv_ops = np.swapaxes((~S).outer(basis).data, -1, -2).reshape(-1, 3, 3)
+    normals = fs.data.reshape(-1, 3)
+    return pre, centers, np.ascontiguousarray(inv_ops), normals
+
+
+@njit(nogil=True, cache=True)
+def _jit_rotate(q, x, y, z):
+    a, b, c, d = q[0], q[1], q[2], q[3]
+    tx = 2 * (c * z - d * y)
+    ty = 2 * (d * x - b * z)
+    tz = 2 * (b * y - c * x)
+    return (
+        x + a * tx + c * tz - d * ty,
+        y + a * ty + d * tx - b * tz,
+        z + a * tz + b * ty - c * tx,
+    )
+
+
+@njit(nogil=True, cache=True)
+def _jit_matmul(m, x, y, z):
+    return (
+        m[0, 0] * x + m[0, 1] * y + m[0, 2] * z,
+        m[1, 0] * x + m[1, 1] * y + m[1, 2] * z,
+        m[2, 0] * x + m[2, 1] * y + m[2, 2] * z,
+    )
+
+
+@njit(nogil=True, cache=True)
+def _jit_sector_op(x, y, z, pre, centers, normals):
+    # Which operations project the vector to the fundamental sector:
+    # whether the pre-projection is applied, and the index of the
+    # inverse symmetry operation (-1 if none)
+    if centers.shape[0] == 0:
+        return False, -1
+
+    flip = z < 0
+    if flip:
+        x, y, z = _jit_matmul(pre, x, y, z)
+
+    inside = True
+    for k in range(normals.shape[0]):
+        if normals[k, 0] * x + normals[k, 1] * y + normals[k, 2] * z <= -1e-9:
+            inside = False
+            break
+    if inside:
+        return flip, -1
+
+    best = 0
+    closest = -np.inf
+    for j in range(centers.shape[0]):
+        closeness = centers[j, 0] * x + centers[j, 1] * y + centers[j, 2] * z
+        closeness = np.rint(closeness * 1e12) / 1e12
+        if closeness > closest:
+            closest = closeness
+            best = j
+    return flip, best
+
+
+@njit(nogil=True, cache=True)
+def _jit_apply_sector_op(x, y, z, flip, best, pre, inv_ops):
+    if flip:
+        x, y, z = _jit_matmul(pre, x, y, z)
+    if best >= 0:
+        x, y, z = _jit_matmul(inv_ops[best], x, y, z)
+    return x, y, z
+
+
+@njit(nogil=True, cache=True)
+def _jit_in_fundamental_sector(x, y, z, pre, centers, inv_ops, normals):
+    flip, best = _jit_sector_op(x, y, z, pre, centers, normals)
+    return _jit_apply_sector_op(x, y, z, flip, best, pre, inv_ops)
+
+
+@contextmanager
+def _num_threads(workers: int):
+    """Temporarily set the number of threads used by parallel Numba kernels in this thread
+
+    :param workers: Number of threads. -1 uses all available cores
+    :type workers: int
+    :raises ValueError: If :code:`workers` is not a positive integer or -1
+    """
+    if workers == -1:
+        workers = numba.config.NUMBA_NUM_THREADS
+    if not isinstance(workers, (int, np.integer)) or workers < 1:
+        raise ValueError(f"`workers` must be a positive integer or -1, got {workers}")
+    previous = numba.get_num_threads()
+    numba.set_num_threads(min(workers, numba.config.NUMBA_NUM_THREADS))
+    try:
+        yield
+    finally:
+        numba.set_num_threads(previous)
+
+
+@njit(nogil=True, cache=True)
+def _jit_weight(weights, i):
+    # An empty array of weights means all quaternions count equally
+    return weights[i] if weights.shape[0] else 1.0
+
+
+@njit(nogil=True, cache=True)
+def _jit_quaternion_multiply(p, q):
+    return (
+        p[0] * q[0] - p[1] * q[1] - p[2] * q[2] - p[3] * q[3],
+        p[0] * q[1] + p[1] * q[0] + p[2] * q[3] - p[3] * q[2],
+        p[0] * q[2] - p[1] * q[3] + p[2] * q[0] + p[3] * q[1],
+        p[0] * q[3] + p[1] * q[2] - p[2] * q[1] + p[3] * q[0],
+    )
+
+
+@njit(nogil=True, cache=True)
+def _jit_misorientation(leader, q, symmetry):
+    # Largest |cos(omega / 2)| between the leader and the symmetric equivalents of q,
+    # and the equivalent (with sign) that achieves it
+    best = -1.0
+    aligned = (q[0], q[1], q[2], q[3])
+    for j in range(symmetry.shape[0]):
+        a, b, c, d = _jit_quaternion_multiply(symmetry[j], q)
+        dot = leader[0] * a + leader[1] * b + leader[2] * c + leader[3] * d
+        if abs(dot) > best:
+            best = abs(dot)
+            sign = 1.0 if dot >= 0 else -1.0
+            aligned = (sign * a, sign * b, sign * c, sign * d)
+    return best, aligned
+
+
+@njit(nogil=True, cache=True)
+def _jit_cluster(quats, symmetry, min_cosine, width, labels):
+    # Leader clustering, checking the grains of the left and upper neighbours first,
+    # and then the most recently found grains
+    n_recent = 256
+    capacity = 1024
+    leaders = np.empty((capacity, 4))
+    sums = np.zeros((capacity, 4))
+    counts = np.zeros(capacity)
+    n_grains = 0
+
+    for i in range(quats.shape[0]):
+        found = -1
+        aligned = (0.0, 0.0, 0.0, 0.0)
+        for neighbour in (i - 1, i - width):
+            if neighbour < 0:
+                continue
+            g = labels[neighbour]
+            cosine, candidate = _jit_misorientation(leaders[g], quats[i], symmetry)
+            if cosine >= min_cosine:
+                found, aligned = g, candidate
+                break
+        if found < 0:
+            for g in range(n_grains - 1, max(n_grains - n_recent, 0) - 1, -1):
+                cosine, candidate = _jit_misorientation(leaders[g], quats[i], symmetry)
+                if cosine >= min_cosine:
+                    found, aligned = g, candidate
+                    break
+        if found < 0:
+            if n_grains == capacity:
+                capacity *= 2
+                leaders = _jit_grow(leaders, capacity)
+                sums = _jit_grow(sums, capacity)
+                counts = _jit_grow(counts, capacity)
+            found = n_grains
+            n_grains += 1
+            leaders[found] = quats[i]
+            aligned = (quats[i, 0], quats[i, 1], quats[i, 2], quats[i, 3])
+
+        labels[i] = found
+        counts[found] += 1
+        for k in range(4):
+            sums[found, k] += aligned[k]
+
+    grains = sums[:n_grains]
+    for g in range(n_grains):
+        grains[g] /= np.sqrt(np.sum(np.square(grains[g])))
+    return grains.copy(), counts[:n_grains].copy()
+
+
+@njit(nogil=True, cache=True)
+def _jit_grow(a, capacity):
+    grown = np.zeros((capacity,) + a.shape[1:])
+    grown[: a.shape[0]] = a
+    return grown
+
+
+@njit(nogil=True, cache=True)
+def _jit_sample_frame_axis(holder, axis):
+    # The optical axis in the sample frame is the same for every pixel
+    conj = np.array([holder[0], -holder[1], -holder[2], -holder[3]])
+    return _jit_rotate(conj, axis[0], axis[1], axis[2])
+
+
+@njit(nogil=True, cache=True)
+def _jit_vector_angle(x, y, z, tx, ty, tz):
+    # Unlike arccos of the dot product, this is accurate for nearly parallel vectors,
+    # also in single precision, and does not depend on the length of the vectors
+    cx, cy, cz = y * tz - z * ty, z * tx - x * tz, x * ty - y * tx
+    return np.arctan2(np.sqrt(cx * cx + cy * cy + cz * cz), x * tx + y * ty + z * tz)
+
+
+@njit(nogil=True, cache=True)
+def _jit_angle(q, wx, wy, wz, pre, centers, inv_ops, normals, tx, ty, tz):
+    x, y, z = _jit_rotate(q, wx, wy, wz)
+    x, y, z = _jit_in_fundamental_sector(x, y, z, pre, centers, inv_ops, normals)
+    return _jit_vector_angle(x, y, z, tx, ty, tz)
+
+
+def _angle_with_kernel(
+    quats, holder, axis, pre, centers, inv_ops, normals, target, out
+):
+    wx, wy, wz = _jit_sample_frame_axis(holder, axis)
     norm = np.sqrt(np.sum(np.square(target)))
-    cosines = dot / norm
-    angles = np.arccos(cosines)
-    return angles
+    tx, ty, tz = target[0] / norm, target[1] / norm, target[2] / norm
+
+    for i in prange(quats.shape[0]):
+        out[i] = _jit_angle(
+            quats[i], wx, wy, wz, pre, centers, inv_ops, normals, tx, ty, tz
+        )
+    return out
+
+
+def _mean_angle_with_kernel(
+    quats,
+    weights,
+    holders,
+    axis,
+    pre,
+    centers,
+    inv_ops,
+    normals,
+    targets,
+    partial,
+    out,
+):
+    # Each tilted pixel vector is projected once and compared with every target.
+    # The pixels are split into blocks, each accumulating its own partial sums
+    n = quats.shape[0]
+    n_blocks = partial.shape[0]
+    n_targets = targets.shape[0]
+    total_weight = weights.sum() if weights.shape[0] else n
+
+    for m in range(holders.shape[0]):
+        wx, wy, wz = _jit_sample_frame_axis(holders[m], axis)
+        for b in prange(n_blocks):
+            partial[b] = 0.0
+            for i in range(b * n // n_blocks, (b + 1) * n // n_blocks):
+                x, y, z = _jit_rotate(quats[i], wx, wy, wz)
+                x, y, z = _jit_in_fundamental_sector(
+                    x, y, z, pre, centers, inv_ops, normals
+                )
+                weight = _jit_weight(weights, i)
+                for t in range(n_targets):
+                    partial[b, t] += weight * _jit_vector_angle(
+                        x, y, z, targets[t, 0], targets[t, 1], targets[t, 2]
+                    )
+        for t in range(n_targets):
+            out[m, t] = partial[:, t].sum() / total_weight
+    return out
+
+
+def _mean_angle_with_gradient_kernel(
+    quats, weights, w, dws, pre, centers, inv_ops, normals, target, scores, grads
+):
+    # The pixels are split into blocks, each accumulating its own partial sums
+    norm = np.sqrt(np.sum(np.square(target)))
+    tx, ty, tz = target[0] / norm, target[1] / norm, target[2] / norm
+    n = quats.shape[0]
+    n_blocks = scores.shape[0]
+
+    for b in prange(n_blocks):
+        total = 0.0
+        for i in range(b * n // n_blocks, (b + 1) * n // n_blocks):
+            x, y, z = _jit_rotate(quats[i], w[0], w[1], w[2])
+            flip, best = _jit_sector_op(x, y, z, pre, centers, normals)
+            x, y, z = _jit_apply_sector_op(x, y, z, flip, best, pre, inv_ops)
+            weight = _jit_weight(weights, i)
+            angle = _jit_vector_angle(x, y, z, tx, ty, tz)
+            total += weight * angle
+
+            # d(arccos(c)) = -dc / sin(angle), and the symmetry operation is constant
+            sine = np.sin(angle)
+            if sine < 3e-8:
+                continue
+            scale = -weight / sine
+            for k in range(dws.shape[0]):
+                dx, dy, dz = _jit_rotate(quats[i], dws[k, 0], dws[k, 1], dws[k, 2])
+                dx, dy, dz = _jit_apply_sector_op(dx, dy, dz, flip, best, pre, inv_ops)
+                grads[b, k] += scale * (dx * tx + dy * ty + dz * tz)
+        scores[b] = total
+    return scores, grads
+
+
+def _compile(kernel: Callable, parallel: bool = False) -> Callable:
+    """Compile a kernel with Numba, caching the machine code on disk.
+
+    Numba names its cache files after the function, and does not include the
+    compilation flags in the cache key. The parallel variant is therefore compiled
+    from a renamed copy, so the two variants do not overwrite each other's entries.
+    """
+    if parallel:
+        name = f"{kernel.__name__}_parallel"
+        kernel = types.FunctionType(
+            kernel.__code__,
+            kernel.__globals__,
+            name,
+            kernel.__defaults__,
+            kernel.__closure__,
+        )
+        kernel.__qualname__ = name
+    return njit(parallel=parallel, nogil=True, cache=True)(kernel)
+
+
+_jit_angle_with = _compile(_angle_with_kernel)
+_jit_angle_with_parallel = _compile(_angle_with_kernel, parallel=True)
+_jit_mean_angle_with = _compile(_mean_angle_with_kernel)
+_jit_mean_angle_with_parallel = _compile(_mean_angle_with_kernel, parallel=True)
+_jit_mean_angle_with_gradient = _compile(_mean_angle_with_gradient_kernel)
+_jit_mean_angle_with_gradient_parallel = _compile(
+    _mean_angle_with_gradient_kernel, parallel=True
+)
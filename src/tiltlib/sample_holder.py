@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import numpy as np
+from numba import njit
+from orix.quaternion import Rotation
 from orix.vector import Vector3d
 
 from tiltlib.axis import Axis
@@ -25,6 +27,7 @@ class SampleHolder:
 
         self.axes = [axis.copy() for axis in axes]
         self.axes[0].extrinsic = True
+        self._rotation_table = None
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}:\n" + "\n".join(str(ax) for ax in self.axes)
@@ -102,16 +105,355 @@ class SampleHolder:
         self.rotate_to(*angles)
 
     @property
-    def _rotation(self):
-        R = self.axes[0].R
+    def _rotation(self) -> Rotation:
+        return Rotation(self._quaternions_at([self.angles], check=False))
 
-        for axis in self.axes[1:]:
+    def rotations_at(self, angles: np.ndarray, degrees: bool = False) -> Rotation:
+        """Rotations of the sample holder at many tilt states at once,
+        without changing the current tilt angles
+
+        :param angles: Tilt angles with shape :code:`(N, n_axes)`, in order of tilt axes.
+            With a single axis, a 1D array of :code:`N` angles is also accepted
+        :type angles: np.ndarray
+        :param degrees: Whether angles are in degrees(True) or radians(False), defaults to False
+        :type degrees: bool, optional
+        :raises ValueError: If the number of angles per state does not match the number of axes
+        :raises IndexError: If any angle is out of range for its axis
+        :return: Rotations, with shape :code:`(N,)`
+        :rtype: Rotation
+        """
+        angles = np.asarray(angles, dtype=float)
+        if degrees:
+            angles = np.deg2rad(angles)
+        return Rotation(self._quaternions_at(angles))
+
+    def _quaternions_at(self, angles: np.ndarray, check: bool = True) -> np.ndarray:
+        """Quaternion data of the sample holder rotation at many tilt states,
+        composed in one vectorized pass over the axes
+
+        :param angles: Tilt angles in radians, with shape :code:`(N, n_axes)`
+        :type angles: np.ndarray
+        :param check: Whether to validate the angles against the axes, defaults to True
+        :type check: bool, optional
+        :return: Quaternions, with shape :code:`(N, 4)`
+        :rtype: np.ndarray
+        """
+        angles = np.asarray(angles, dtype=float)
+        if angles.ndim == 1 and len(self.axes) == 1:
+            angles = angles[:, np.newaxis]
+        if check:
+            self._check_angle_array(angles)
+        if self._rotation_table is not None:
+            return self._interpolate_rotation_table(angles)
+
+        q = self.axes[0]._quaternions(angles[:, 0])
+        for i, axis in enumerate(self.axes[1:], start=1):
             if axis.intrinsic:
-                R = R * axis.R
+                q = _quaternion_multiply(q, axis._quaternions(angles[:, i]))
             else:
-                R = axis.R * R
+                q = _quaternion_multiply(axis._quaternions(angles[:, i]), q)
 
-        return R
+        return q
+
+    def build_rotation_table(
+        self, resolution: float | None = 0.5, degrees: bool = True
+    ) -> None:
+        """Precompute the holder rotation on a grid spanning the range of every axis.
+        Later rotations, at the current tilt angles or at many tilt states at once, are
+        looked up in the table and blended with one spherical linear interpolation (SLERP)
+        per axis in a compiled kernel, instead of being composed from the axes. This mostly
+        speeds up single-state updates, such as :meth:`tiltlib.Sample.plot_interactive`.
+
+        Along each axis, the holder rotation follows a great circle of unit quaternions at
+        constant speed, and the other axes only multiply it from the left or right, which
+        preserves great circles. The interpolated rotations are therefore exact up to
+        floating point rounding, with errors below 1e-12 radians for any resolution below
+        180 degrees. The table holds :code:`32` bytes per grid point.
+
+        :param resolution: Largest spacing between the grid points of each axis.
+            None removes the table, defaults to 0.5
+        :type resolution: float | None, optional
+        :param degrees: Whether the resolution is in degrees(True) or radians(False), defaults to True
+        :type degrees: bool, optional
+        :raises ValueError: If the resolution is not between 0 and 180 degrees
+        """
+        if resolution is None:
+            self._rotation_table = None
+            return
+        if degrees:
+            resolution = np.deg2rad(resolution)
+        if not 0 < resolution < np.pi:
+            raise ValueError("The resolution must be between 0 and 180 degrees")
+
+        grid = []
+        for ax in self.axes:
+            n = max(2, int(np.ceil((ax.max - ax.min) / resolution - 1e-9)) + 1)
+            grid.append(np.linspace(ax.min, ax.max, n))
+        self._rotation_table = None
+        states = np.stack([g.ravel() for g in np.meshgrid(*grid, indexing="ij")], -1)
+        table = self._quaternions_at(states, check=False)
+        self._rotation_table = (
+            np.array([g[0] for g in grid]),
+            np.array([g[1] - g[0] for g in grid]),
+            table.reshape(*(len(g) for g in grid), 4),
+        )
+
+    def _interpolate_rotation_table(self, angles: np.ndarray) -> np.ndarray:
+        """Quaternion data of the sample holder rotation at many tilt states,
+        blended from the corners of their cells in the rotation table
+
+        :param angles: Tilt angles in radians, with shape :code:`(N, n_axes)`
+        :type angles: np.ndarray
+        :return: Quaternions, with shape :code:`(N, 4)`
+        :rtype: np.ndarray
+        """
+        start, step, table = self._rotation_table
+        counts = np.array(table.shape[:-1])
+        strides = np.append(np.cumprod(counts[:0:-1])[::-1], 1)
+        return _jit_interpolate_rotation_table(
+            table.reshape(-1, 4),
+            strides,
+            counts,
+            start,
+            step,
+            np.ascontiguousarray(angles, dtype=float),
+            np.zeros((len(angles), 4)),
+        )
+
+    @property
+    def _composition_order(self) -> list[int]:
+        """Indices of the axes in the order their rotations are multiplied, from left to right"""
+        order = [0]
+        for i, axis in enumerate(self.axes[1:], start=1):
+            if axis.intrinsic:
+                order.append(i)
+            else:
+                order.insert(0, i)
+        return order
+
+    def _TEM_frame_to_sample_frame_jacobian(
+        self, angles: np.ndarray, v: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Convert a vector in TEM coordinates to sample coordinates at the given angles,
+        along with the derivative of the sample vector with respect to each tilt angle
+
+        :param angles: Tilt angles, in radians
+        :type angles: np.ndarray
+        :param v: TEM vector, with shape :code:`(3,)`
+        :type v: np.ndarray
+        :return: Sample vector with shape :code:`(3,)`,
+            and its derivatives with shape :code:`(n_axes, 3)` in order of tilt axes
+        :rtype: tuple[np.ndarray, np.ndarray]
+        """
+        directions = [axis.direction.unit.data.reshape(3) for axis in self.axes]
+        relative = [angle - axis._initial_angle for angle, axis in zip(angles, self.axes)]
+        order = self._composition_order
+
+        # R = P_1 ... P_n, so the sample vector is P_n^-1 ... P_1^-1 v
+        u = [np.asarray(v, dtype=float)]
+        for i in order:
+            u.append(_rotate_about(directions[i], -relative[i], u[-1]))
+
+        dw = np.empty((len(self.axes), 3))
+        for position, i in enumerate(order):
+            d = -np.cross(directions[i], u[position + 1])
+            for j in order[position + 1 :]:
+                d = _rotate_about(directions[j], -relative[j], d)
+            dw[i] = d
+        return u[-1], dw
+
+    def _check_angle_array(self, angles: np.ndarray) -> None:
+        """Raises an appropriate error if any row of a :code:`(N, n_axes)` array of angles
+        is incompatible with the sample holder
+        """
+        if angles.ndim != 2:
+            raise ValueError(
+                f"Expected an array of shape (N, {len(self.axes)}), got {angles.shape}"
+            )
+        if angles.shape[1] > len(self.axes):
+            raise ValueError(
+                f"Too many angles. Expexted {len(self.axes)}, got {angles.shape[1]}"
+            )
+        if angles.shape[1] < len(self.axes):
+            raise ValueError(
+                f"Too few angles. Expexted {len(self.axes)}, got {angles.shape[1]}"
+            )
+        mins = np.array([ax.min for ax in self.axes])
+        maxs = np.array([ax.max for ax in self.axes])
+        if not np.all((mins <= angles) & (angles <= maxs)):
+            raise IndexError(
+                "Angle out of range for one or more axes"
+                + f"\n{self.axes = }"
+            )
+
+    def tilt_grid(self, resolution: float, degrees: bool = False) -> list[np.ndarray]:
+        """Evenly spaced tilt angles spanning the range of each axis
+
+        :param resolution: Spacing between the angles
+        :type resolution: float
+        :param degrees: Whether the resolution and returned angles are in degrees(True) or radians(False), defaults to False
+        :type degrees: bool, optional
+        :return: Angles for each tilt axis, in order of tilt axes
+        :rtype: list[np.ndarray]
+        """
+        if degrees:
+            return [
+                np.arange(np.rad2deg(ax.min), np.rad2deg(ax.max), resolution)
+                for ax in self.axes
+            ]
+        return [np.arange(ax.min, ax.max, resolution) for ax in self.axes]
+
+    def align_angles(
+        self, v: Vector3d, target: Vector3d = None, degrees: bool = False
+    ) -> np.ndarray:
+        """Calculate every set of tilt angles within the axis limits that brings
+        a direction in the sample frame parallel to a direction in the TEM frame.
+        The angles are found in closed form, which is only supported for sample holders
+        with two non-parallel tilt axes, such as a standard double-tilt holder.
+
+        :param v: Direction(s) in the sample frame
+        :type v: Vector3d
+        :param target: Direction in the TEM frame, defaults to the optical axis (the z-axis)
+        :type target: Vector3d, optional
+        :param degrees: Whether to return degrees(True) or radians(False), defaults to False
+        :type degrees: bool, optional
+        :raises NotImplementedError: If the sample holder does not have exactly two non-parallel axes
+        :return: Tilt angles with shape :code:`(M, 2)`, in order of tilt axes.
+            :code:`M` is 0 if the direction is out of reach
+        :rtype: np.ndarray
+        """
+        if target is None:
+            target = Vector3d.zvector()
+        relative = self._align_relative(
+            v.unit.data.reshape(-1, 3), target.unit.data.reshape(3)
+        )
+        # Both solutions of every direction, ordered by solution
+        relative = relative.transpose(1, 0, 2).reshape(-1, 2)
+        relative = relative[~np.isnan(relative).any(axis=-1)]
+
+        # Shift by whole turns to find every representation within the axis limits
+        solutions = []
+        turns = 2 * np.pi * np.arange(-2, 3)
+        for rel in relative:
+            candidates = [
+                [
+                    angle
+                    for angle in rel[i] + axis._initial_angle + turns
+                    if axis.min <= angle <= axis.max
+                ]
+                for i, axis in enumerate(self.axes)
+            ]
+            solutions.extend((a1, a2) for a1 in candidates[0] for a2 in candidates[1])
+
+        solutions = np.array(solutions, dtype=float).reshape(-1, 2)
+        if solutions.size:
+            _, idx = np.unique(solutions.round(9), axis=0, return_index=True)
+            solutions = solutions[np.sort(idx)]
+        if degrees:
+            solutions = np.rad2deg(solutions)
+        return solutions
+
+    def _closest_align_angles(
+        self, v: np.ndarray, target: np.ndarray, reference: np.ndarray
+    ) -> np.ndarray:
+        """Tilt angles within the axis limits that bring any of several directions
+        in the sample frame parallel to a direction in the TEM frame, choosing the
+        solution closest to the reference angles, in one vectorized pass
+
+        :param v: Unit directions in the sample frame, with shape :code:`(..., E, 3)`.
+            Every direction along the second to last axis is a candidate
+        :type v: np.ndarray
+        :param target: Unit direction in the TEM frame, with shape :code:`(3,)`
+        :type target: np.ndarray
+        :param reference: Tilt angles in radians, with shape :code:`(2,)`
+        :type reference: np.ndarray
+        :raises NotImplementedError: If the sample holder does not have exactly two non-parallel axes
+        :return: Tilt angles in radians with shape :code:`(..., 2)`, NaN where none of the
+            directions can be aligned within the axis limits
+        :rtype: np.ndarray
+        """
+        angles = self._align_relative(v, target) + self._initial_angles
+        mins = np.array([ax.min for ax in self.axes])
+        maxs = np.array([ax.max for ax in self.axes])
+
+        # For each axis, the whole turn closest to the reference within the limits
+        turns = 2 * np.pi * np.round((angles - reference) / (2 * np.pi))
+        shifted = (angles - turns)[..., np.newaxis] + 2 * np.pi * np.arange(-1, 2)
+        within = (mins[:, np.newaxis] <= shifted) & (shifted <= maxs[:, np.newaxis])
+        distance = np.where(within, np.abs(shifted - reference[:, np.newaxis]), np.inf)
+        best = np.argmin(distance, axis=-1)
+        angles = np.take_along_axis(shifted, best[..., np.newaxis], -1)[..., 0]
+        distance = np.take_along_axis(distance, best[..., np.newaxis], -1)[..., 0]
+
+        # The closest solution over every direction and both cone intersections
+        shape = angles.shape[:-3]
+        angles = angles.reshape(*shape, -1, 2)
+        distance = np.linalg.norm(distance.reshape(*shape, -1, 2), axis=-1)
+        best = np.argmin(np.nan_to_num(distance, nan=np.inf), axis=-1)
+        solutions = np.take_along_axis(angles, best[..., np.newaxis, np.newaxis], -2)
+        solutions = solutions[..., 0, :]
+        reachable = np.isfinite(np.min(distance, axis=-1, initial=np.inf))
+        solutions[~reachable] = np.nan
+        return solutions
+
+    def _align_relative(self, s: np.ndarray, z: np.ndarray) -> np.ndarray:
+        """Tilt angles relative to the initial angles that bring each direction :code:`s`
+        in the sample frame parallel to the direction :code:`z` in the TEM frame
+
+        :param s: Unit directions in the sample frame, with shape :code:`(..., 3)`
+        :type s: np.ndarray
+        :param z: Unit direction in the TEM frame, with shape :code:`(3,)`
+        :type z: np.ndarray
+        :raises NotImplementedError: If the sample holder does not have exactly two non-parallel axes
+        :return: Angles in radians with shape :code:`(..., 2, 2)`, for each of the two solutions
+            and in order of tilt axes. NaN if the direction is out of reach
+        :rtype: np.ndarray
+        """
+        if len(self.axes) != 2:
+            raise NotImplementedError(
+                "Closed-form tilt angles are only supported for two tilt axes"
+            )
+        first, second = self.axes
+        a = first.direction.unit.data.reshape(3)
+        b = second.direction.unit.data.reshape(3)
+        d = np.dot(a, b)
+        if np.isclose(abs(d), 1):
+            raise NotImplementedError(
+                "Closed-form tilt angles are not supported for parallel tilt axes"
+            )
+
+        # The holder rotation is R_a * R_b (intrinsic) or R_b * R_a (extrinsic).
+        # The direction is rotated about k1 first, and then onto the target about k2
+        if second.intrinsic:
+            k1, k2 = b, a
+        else:
+            k1, k2 = a, b
+
+        # Intersect the cone about k1 through s with the cone about k2 through target
+        c1 = s @ k1
+        c2 = z @ k2
+        x = (c1 - d * c2) / (1 - d**2)
+        y = (c2 - d * c1) / (1 - d**2)
+        gamma_sq = (1 - x**2 - y**2 - 2 * x * y * d) / (1 - d**2)
+        gamma = np.sqrt(np.clip(gamma_sq, 0, None))
+        gamma[gamma_sq < -1e-12] = np.nan
+
+        k1k2 = np.cross(k1, k2)
+        w = np.stack(
+            [
+                x[..., np.newaxis] * k1
+                + y[..., np.newaxis] * k2
+                + g[..., np.newaxis] * k1k2
+                for g in (gamma, -gamma)
+            ],
+            axis=-2,
+        )
+
+        theta_1 = _angle_about(k1, s[..., np.newaxis, :], w)
+        theta_2 = _angle_about(k2, w, z)
+        if second.intrinsic:
+            return np.stack([theta_2, theta_1], axis=-1)
+        return np.stack([theta_1, theta_2], axis=-1)
 
     def rotation_matrix(self) -> np.ndarray:
         """Returns the 3x3 rotation matrix transforming the 
@@ -144,3 +486,64 @@ class SampleHolder:
         :rtype: Vector3d
         """
         return ~self._rotation * v
+
+
+def _quaternion_multiply(p: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """Hamilton product of two broadcastable arrays of quaternions, with shape :code:`(..., 4)`"""
+    a1, b1, c1, d1 = np.moveaxis(p, -1, 0)
+    a2, b2, c2, d2 = np.moveaxis(q, -1, 0)
+    return np.stack(
+        [
+            a1 * a2 - b1 * b2 - c1 * c2 - d1 * d2,
+            a1 * b2 + b1 * a2 + c1 * d2 - d1 * c2,
+            a1 * c2 - b1 * d2 + c1 * a2 + d1 * b2,
+            a1 * d2 + b1 * c2 - c1 * b2 + d1 * a2,
+        ],
+        axis=-1,
+    )
+
+
+def _angle_about(k: np.ndarray, p: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """Signed angle of the rotations about the unit vector :code:`k`
+    taking each vector in :code:`p` to the plane spanned by :code:`k` and :code:`q`"""
+    p = p - (p @ k)[..., np.newaxis] * k
+    q = q - (q @ k)[..., np.newaxis] * k
+    return np.arctan2(np.cross(p, q) @ k, np.sum(p * q, axis=-1))
+
+
+def _rotate_about(k: np.ndarray, angle: float, v: np.ndarray) -> np.ndarray:
+    """Rotate a vector about the unit vector :code:`k` by the given angle, in radians"""
+    cos, sin = np.cos(angle), np.sin(angle)
+    return v * cos + np.cross(k, v) * sin + k * np.dot(k, v) * (1 - cos)
+
+
+@njit(nogil=True, cache=True)
+def _jit_interpolate_rotation_table(table, strides, counts, start, step, angles, out):
+    # The nested SLERPs are linear in the corner quaternions, so each corner of the
+    # cell contributes with the product of its SLERP weight along every axis.
+    # The quaternions of neighbouring grid points are half a grid step apart
+    n_axes = angles.shape[1]
+    weights = np.empty((n_axes, 2))
+    for i in range(angles.shape[0]):
+        base = 0
+        for k in range(n_axes):
+            position = (angles[i, k] - start[k]) / step[k] if step[k] > 0 else 0.0
+            index = min(max(int(np.floor(position)), 0), counts[k] - 2)
+            t = min(max(position - index, 0.0), 1.0)
+            omega = step[k] / 2
+            if np.sin(omega) > 0:
+                weights[k, 0] = np.sin((1 - t) * omega) / np.sin(omega)
+                weights[k, 1] = np.sin(t * omega) / np.sin(omega)
+            else:
+                weights[k, 0], weights[k, 1] = 1 - t, t
+            base += index * strides[k]
+        for corner in range(2**n_axes):
+            weight = 1.0
+            offset = base
+            for k in range(n_axes):
+                bit = (corner >> (n_axes - 1 - k)) & 1
+                weight *= weights[k, bit]
+                offset += bit * strides[k]
+            for j in range(4):
+                out[i, j] += weight * table[offset, j]
+    return out
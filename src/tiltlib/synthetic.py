@@ -0,0 +1,191 @@
+"""Synthetic orientation maps, for testing and benchmarking without downloaded data"""
+
+from __future__ import annotations
+
+import numpy as np
+from orix.crystal_map import CrystalMap, Phase, PhaseList
+from orix.quaternion import Rotation
+from scipy.spatial import cKDTree
+
+from tiltlib.sample import Sample
+from tiltlib.sample_holder import Axis, _quaternion_multiply
+
+
+def synthetic_quaternions(
+    shape: tuple[int, ...],
+    n_grains: int = 100,
+    spread: float = None,
+    noise: float = 0.0,
+    outliers: float = 0.0,
+    seed: int = None,
+    dtype: type = np.float64,
+    out: np.ndarray = None,
+    chunk_size: int = 2**20,
+) -> np.ndarray:
+    """Quaternions of a map of Voronoi grains, each with its own orientation.
+
+    The grain centers are spread uniformly over the map, and each pixel belongs to
+    the nearest center. The map is generated in chunks of pixels, so that it can be
+    written directly to a memory-mapped :code:`out` array larger than the memory.
+    The same seed and chunk size give the same map.
+
+    :param shape: Shape of the map, in pixels
+    :type shape: tuple[int, ...]
+    :param n_grains: Number of grains, defaults to 100
+    :type n_grains: int, optional
+    :param spread: Standard deviation, in degrees, of each component of the rotation
+        vectors taking the identity to the grain orientations. If None, the grain
+        orientations are uniformly random, defaults to None
+    :type spread: float, optional
+    :param noise: Standard deviation, in degrees, of each component of the rotation
+        vectors taking the grain orientation to the pixel orientations, defaults to 0.0
+    :type noise: float, optional
+    :param outliers: Fraction of pixels given a uniformly random orientation instead,
+        like mis-indexed pixels, defaults to 0.0
+    :type outliers: float, optional
+    :param seed: Seed of the random number generator, defaults to None
+    :type seed: int, optional
+    :param dtype: Floating point type of the quaternions, defaults to np.float64
+    :type dtype: type, optional
+    :param out: C-contiguous array with shape :code:`(*shape, 4)` to write the
+        quaternions to, such as a :code:`np.memmap`, defaults to None
+    :type out: np.ndarray, optional
+    :param chunk_size: Number of pixels generated at once, defaults to 2**20
+    :type chunk_size: int, optional
+    :raises ValueError: If :code:`n_grains` is not positive, :code:`outliers` is not
+        between 0 and 1, or :code:`out` does not have the shape of the map
+    :return: Unit quaternions, with shape :code:`(*shape, 4)`
+    :rtype: np.ndarray
+    """
+    shape = tuple(int(n) for n in np.atleast_1d(shape))
+    if n_grains < 1:
+        raise ValueError(f"`n_grains` must be positive, got {n_grains}")
+    if not 0 <= outliers <= 1:
+        raise ValueError(f"`outliers` must be between 0 and 1, got {outliers}")
+    if out is None:
+        out = np.empty(shape + (4,), dtype=dtype)
+    elif out.shape != shape + (4,) or not out.flags.c_contiguous:
+        raise ValueError(
+            f"`out` must be C-contiguous with shape {shape + (4,)}, got {out.shape}"
+        )
+
+    grain_seed, *chunk_seeds = np.random.SeedSequence(seed).spawn(
+        1 + -(-int(np.prod(shape)) // chunk_size)
+    )
+    rng = np.random.default_rng(grain_seed)
+    centers = rng.random((n_grains, len(shape))) * shape
+    if spread is None:
+        grains = _random_quaternions(rng, n_grains)
+    else:
+        grains = _small_quaternions(rng, n_grains, np.deg2rad(spread))
+    tree = cKDTree(centers)
+
+    flat_out = out.reshape(-1, 4)
+    for i, chunk_seed in enumerate(chunk_seeds):
+        rng = np.random.default_rng(chunk_seed)
+        index = np.arange(i * chunk_size, min((i + 1) * chunk_size, len(flat_out)))
+        pixels = np.stack(np.unravel_index(index, shape), axis=-1) + 0.5
+        _, labels = tree.query(pixels, workers=-1)
+        quats = grains[labels]
+        if noise:
+            quats = _quaternion_multiply(
+                quats, _small_quaternions(rng, len(index), np.deg2rad(noise))
+            )
+        if outliers:
+            is_outlier = rng.random(len(index)) < outliers
+            quats[is_outlier] = _random_quaternions(rng, int(is_outlier.sum()))
+        flat_out[index[0] : index[-1] + 1] = quats
+    return out
+
+
+def synthetic_crystal_map(
+    shape: tuple[int, int],
+    phase: Phase = None,
+    step: float = 1.0,
+    **kwargs,
+) -> CrystalMap:
+    """Crystal map of Voronoi grains, see :func:`synthetic_quaternions`
+
+    :param shape: Shape of the map, in pixels
+    :type shape: tuple[int, int]
+    :param phase: Phase of every pixel, defaults to a cubic phase with point group m-3m
+    :type phase: Phase, optional
+    :param step: Distance between neighbouring pixels, defaults to 1.0
+    :type step: float, optional
+    :param kwargs: Keyword arguments passed to :func:`synthetic_quaternions`
+    :raises ValueError: If the map is not two-dimensional
+    :return: Orientation map
+    :rtype: CrystalMap
+    """
+    if len(shape) != 2:
+        raise ValueError(f"Only two-dimensional maps are supported, got {shape}")
+    if phase is None:
+        phase = Phase(name="synthetic", point_group="m-3m")
+    quats = synthetic_quaternions(shape, **kwargs).reshape(-1, 4)
+    rows, cols = np.indices(shape).reshape(2, -1) * step
+    return CrystalMap(
+        Rotation(quats),
+        phase_id=np.zeros(len(quats), dtype=int),
+        x=cols,
+        y=rows,
+        phase_list=PhaseList(phase),
+    )
+
+
+def synthetic_sample(
+    shape: tuple[int, ...],
+    axes: list[Axis],
+    phase: Phase = None,
+    dtype: type = np.float64,
+    out: np.ndarray = None,
+    chunk_size: int = 2**20,
+    **kwargs,
+) -> Sample:
+    """Sample of Voronoi grains, see :func:`synthetic_quaternions`.
+
+    If :code:`out` is given, the sample refers to it instead of copying it,
+    and streams over it in chunks like other memory-mapped data.
+
+    :param shape: Shape of the map, in pixels
+    :type shape: tuple[int, ...]
+    :param axes: Tilt axes
+    :type axes: list[Axis]
+    :param phase: Phase of the sample, defaults to a cubic phase with point group m-3m
+    :type phase: Phase, optional
+    :param dtype: Floating point type of the sample, see :class:`Sample`, defaults to np.float64
+    :type dtype: type, optional
+    :param out: Array to write the quaternions to, defaults to None
+    :type out: np.ndarray, optional
+    :param chunk_size: Number of pixels generated, and later streamed over, at once,
+        defaults to 2**20
+    :type chunk_size: int, optional
+    :param kwargs: Keyword arguments passed to :func:`synthetic_quaternions`
+    :return: Sample
+    :rtype: Sample
+    """
+    if phase is None:
+        phase = Phase(name="synthetic", point_group="m-3m")
+    quats = synthetic_quaternions(
+        shape, dtype=dtype, out=out, chunk_size=chunk_size, **kwargs
+    )
+    return Sample(
+        quats, phase, axes, chunk_size=chunk_size, copy=out is None, dtype=dtype
+    )
+
+
+def _random_quaternions(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Uniformly distributed unit quaternions, with shape :code:`(n, 4)`"""
+    quats = rng.standard_normal((n, 4))
+    quats /= np.linalg.norm(quats, axis=-1, keepdims=True)
+    return quats
+
+
+def _small_quaternions(rng: np.random.Generator, n: int, sigma: float) -> np.ndarray:
+    """Unit quaternions of rotation vectors with normally distributed components
+    of standard deviation :code:`sigma`, with shape :code:`(n, 4)`"""
+    vectors = rng.normal(scale=sigma, size=(n, 3))
+    angles = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    quats = np.empty((n, 4))
+    quats[:, :1] = np.cos(angles / 2)
+    quats[:, 1:] = vectors * np.sinc(angles / (2 * np.pi)) / 2
+    return quats
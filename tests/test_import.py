@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+
+
+def _run(code: str) -> str:
+    return subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+
+
+def test_lazy_import():
+    # Importing the package must not load the Sample machinery or hyperspy
+    loaded = _run(
+        "import sys, tiltlib\n"
+        "print(','.join(m for m in ('tiltlib.sample', 'hyperspy') if m in sys.modules))"
+    )
+    assert loaded.strip() == ""
+
+    # Not even when the sample module itself is imported
+    loaded = _run(
+        "import sys\n"
+        "from tiltlib import Sample\n"
+        "print('hyperspy' in sys.modules)"
+    )
+    assert loaded.strip() == "False"
+
@@ -1,7 +1,13 @@
+from __future__ import annotations
+
+import numpy as np
 import pytest
-from .conftest import default_xmap, x
+from hyperspy.roi import CircleROI, PolygonROI, RectangularROI
+from orix.vector import Miller
+
+from .conftest import default_xmap, x, y
 
-from tiltlib import Axis, Sample
+from tiltlib import Axis, Sample, TiltReport
 
 
 @pytest.mark.parametrize(
@@ -140,3 +146,826 @@ def test_rotating_to_initial_angle(x, default_xmap):
     s2.rotate_to(10, degrees=True)
 
     assert s1.orientations == s2.orientations
+
+
+@pytest.mark.parametrize("uvw", [[0, 0, 1], [1, 1, 0], [1, 1, 1], [2, 1, 0]])
+def test_angle_with(uvw: list[int], default_xmap, x, y):
+    s = Sample.from_crystal_map(
+        default_xmap,
+        [Axis(x, -30, 30, degrees=True), Axis(y, -30, 30, intrinsic=True)],
+    )
+    s.rotate_to(12, -7, degrees=True)
+    zone_axis = Miller(uvw=uvw, phase=s.phase)
+
+    vecs = (s.orientations * s.optical_axis).in_fundamental_sector()
+    cosines = np.sum(vecs.data * zone_axis.unit.data, axis=-1)
+    expected = np.rad2deg(np.arccos(np.clip(cosines, -1, 1)))
+
+    assert np.allclose(s.angle_with(zone_axis), expected)
+    assert np.allclose(s.angle_with(zone_axis, degrees=False), np.deg2rad(expected))
+
+
+@pytest.mark.parametrize("workers", [2, -1])
+def test_angle_with_parallel(workers: int, default_xmap, x):
+    s = Sample.from_crystal_map(default_xmap, [Axis(x, -30, 30, degrees=True)])
+    s.rotate_to(10, degrees=True)
+    zone_axis = Miller(uvw=[1, 1, 1], phase=s.phase)
+
+    assert np.allclose(
+        s.angle_with(zone_axis, workers=workers), s.angle_with(zone_axis)
+    )
+
+    with pytest.raises(ValueError):
+        s.angle_with(zone_axis, workers=0)
+
+
+@pytest.mark.parametrize("uvw", [[0, 0, 1], [1, 0, 0], [1, 1, 0], [1, 1, 2]])
+def test_solve_tilt_angles(uvw: list[int], default_xmap, x, y):
+    s = Sample.from_crystal_map(
+        default_xmap,
+        [Axis(x, -60, 60, degrees=True), Axis(y, -60, 60, intrinsic=True)],
+    )
+    zone_axis = Miller(uvw=uvw, phase=s.phase)
+    score = s._optimize_mean_orientation_func(
+        zone_axis.in_fundamental_sector(), degrees=True
+    )
+
+    solutions = s.solve_tilt_angles(zone_axis)
+    for solution in solutions:
+        assert np.isclose(score(solution), 0, atol=1e-4)
+    s.reset_rotation()
+
+    if solutions.size:
+        found = s.find_tilt_angles(
+            zone_axis, use_mean_orientation=True, full_output=True
+        )
+        assert np.allclose(found.x, solutions[0])
+        # Also for zone axes outside the fundamental sector, such as [1 0 0]
+        assert np.isclose(found.fun, 0, atol=1e-4)
+        assert found.message == "Closed-form solution"
+
+        # The numerical search has the same symmetry handling, and finds one of the
+        # exact solutions with the same score
+        numerical = s.find_tilt_angles(
+            zone_axis,
+            use_mean_orientation=True,
+            global_search=True,
+            resolution=10,
+            full_output=True,
+        )
+        assert numerical.message != "Closed-form solution"
+        assert np.any(np.all(np.abs(solutions - numerical.x) < 0.05, axis=-1))
+        assert np.isclose(numerical.fun, found.fun, atol=0.01)
+        local = s.find_tilt_angles(
+            zone_axis, use_mean_orientation=True, method="Nelder-Mead"
+        )
+        assert np.any(np.all(np.abs(solutions - local) < 0.05, axis=-1))
+
+
+def test_find_tilt_angles_global_search(default_xmap, x, y):
+    s = Sample.from_crystal_map(
+        default_xmap,
+        [Axis(x, -30, 30, degrees=True), Axis(y, -30, 30, intrinsic=True)],
+    )
+    zone_axis = Miller(uvw=[1, 1, 1], phase=s.phase)
+
+    local = s.find_tilt_angles(zone_axis, full_output=True)
+    found = s.find_tilt_angles(
+        zone_axis, global_search=True, resolution=10, n_seeds=2, full_output=True
+    )
+
+    assert found.fun <= local.fun + 1e-6
+    assert found.nfev > 6 * 6
+    assert np.allclose(
+        s.find_tilt_angles(zone_axis, global_search=True, resolution=10, n_seeds=2),
+        found.x,
+    )
+    assert s.angles == s._initial_angles
+
+
+@pytest.mark.parametrize("method", ["Nelder-Mead", "L-BFGS-B"])
+def test_find_tilt_angles_report(method: str, default_xmap, x, y):
+    s = Sample.from_crystal_map(
+        default_xmap,
+        [Axis(x, -30, 30, degrees=True), Axis(y, -30, 30, intrinsic=True)],
+    )
+    zone_axis = Miller(uvw=[1, 1, 1], phase=s.phase)
+    score = s._optimize_angle_with_func(zone_axis, degrees=True)
+
+    report = TiltReport()
+    iterations = []
+    res = s.find_tilt_angles(
+        zone_axis,
+        full_output=True,
+        method=method,
+        report=report,
+        callback=lambda angles, f: iterations.append((angles, f)),
+    )
+    assert res.report is report
+    assert res.x.tolist() == s.find_tilt_angles(zone_axis, method=method).tolist()
+
+    calls = "gradient_calls" if method == "L-BFGS-B" else "objective_calls"
+    assert report.counts[calls] == res.nfev
+    assert report.counts["tilt_states"] == res.nfev
+    assert report.counts["pixel_evaluations"] == res.nfev * np.prod(s.shape)
+    assert report.counts["iterations"] == len(iterations) > 0
+    for angles, f in iterations:
+        assert np.isclose(score(angles), f)
+    assert np.isclose(iterations[-1][1], res.fun)
+
+    timings = report.timings
+    assert set(timings) == {"setup", "holder", "read", "kernel", "optimizer", "total"}
+    assert sum(timings.values()) - timings["total"] <= 1.01 * timings["total"]
+    assert "kernel" in str(report)
+
+    # Reports accumulate over searches
+    s.find_tilt_angles(zone_axis, method=method, report=report)
+    assert report.counts["searches"] == 2
+    report.reset()
+    assert report.as_dict() == {"timings": {}, "counts": {}}
+
+
+@pytest.mark.parametrize("sampling", ["stratified", "random"])
+def test_find_tilt_angles_subsample(sampling: str, default_xmap, x, y):
+    from tiltlib.sample import _subsample_index
+    from tiltlib.synthetic import synthetic_sample
+
+    s = Sample.from_crystal_map(
+        default_xmap,
+        [Axis(x, -30, 30, degrees=True), Axis(y, -30, 30, intrinsic=True)],
+    )
+    zone_axis = Miller(uvw=[1, 1, 1], phase=s.phase)
+    n_pixels = int(np.prod(s.shape))
+    full = s.find_tilt_angles(zone_axis, full_output=True)
+
+    res = s.find_tilt_angles(
+        zone_axis, full_output=True, subsample=100, sampling=sampling, seed=0
+    )
+    assert 100 <= res.n_subsample <= n_pixels
+    assert res.score_error >= 0
+    assert np.isclose(res.fun, s._optimize_angle_with_func(zone_axis, True)(res.x))
+    assert res.fun <= full.fun + 0.5
+    again = s.find_tilt_angles(zone_axis, subsample=100, sampling=sampling, seed=0)
+    assert np.array_equal(again, res.x)
+
+    # A subset of every pixel is the full search
+    res = s.find_tilt_angles(zone_axis, full_output=True, subsample=n_pixels)
+    assert np.allclose(res.x, full.x)
+    assert res.score_error == 0
+
+    # The score, its error and the convergence are in degrees, whatever the angles
+    large = synthetic_sample((200, 200), s.axes, n_grains=20, spread=5, noise=1, seed=0)
+    results = [
+        large.find_tilt_angles(
+            zone_axis, degrees, full_output=True, subsample=1000, seed=0
+        )
+        for degrees in (True, False)
+    ]
+    assert results[1].n_subsample == results[0].n_subsample < 40000
+    assert np.isclose(results[1].score_error, results[0].score_error, rtol=0.01)
+    assert np.isclose(results[1].fun, results[0].fun, atol=0.01)
+
+    index = _subsample_index(n_pixels, 50, sampling, np.random.default_rng(0))
+    assert len(np.unique(index)) == 50
+    assert np.all(np.diff(index) > 0) and 0 <= index[0] and index[-1] < n_pixels
+
+    with pytest.raises(ValueError):
+        s.find_tilt_angles(zone_axis, subsample=100, use_mean_orientation=True)
+    with pytest.raises(ValueError):
+        s.find_tilt_angles(zone_axis, subsample=0)
+    with pytest.raises(ValueError):
+        s.find_tilt_angles(zone_axis, subsample=100, sampling="systematic")
+
+
+def test_find_tilt_angles_subsample_cost(x, y):
+    from tiltlib.synthetic import synthetic_sample
+
+    axes = [Axis(x, -30, 30, degrees=True), Axis(y, -30, 30, intrinsic=True)]
+    large = synthetic_sample((200, 200), axes, n_grains=20, spread=5, noise=1, seed=0)
+    quats = large._quaternions
+
+    class Recorded:
+        """Array-like data recording the number of pixels read from it"""
+
+        shape, dtype, pixels = quats.shape, quats.dtype, []
+
+        def __getitem__(self, key):
+            self.pixels.append(quats[key].size // 4)
+            return quats[key]
+
+    s = Sample(Recorded(), large.phase, axes, chunk_size=20 * 200)
+    zone_axis = Miller(uvw=[1, 1, 1], phase=s.phase)
+    report = TiltReport()
+    res = s.find_tilt_angles(
+        zone_axis, full_output=True, subsample=1000, seed=0, report=report
+    )
+    n_pixels = quats.size // 4
+    assert res.n_subsample < n_pixels
+    # Drawing each subset and scoring the result pass over the map once each,
+    # while the evaluations on the subsets read nothing from it
+    n_subsets = 1 + int(np.log(res.n_subsample / 1000) / np.log(4))
+    assert sum(Recorded.pixels) <= (n_subsets + 1) * n_pixels
+    assert report.counts["objective_calls"] > 3 * n_subsets
+
+
+def test_angle_statistics(default_xmap, x, y):
+    from tiltlib.sample import _HISTOGRAM_BINS
+
+    s = Sample.from_crystal_map(
+        default_xmap,
+        [Axis(x, -30, 30, degrees=True), Axis(y, -30, 30, intrinsic=True)],
+    )
+    zone_axis = Miller(uvw=[1, 1, 0], phase=s.phase)
+    angles = s.angle_with_at((10, -5), zone_axis).ravel()
+
+    stats = s.angle_statistics(
+        zone_axis, (10, -5), percentiles=(0, 10, 90, 100), tolerance=20
+    )
+    assert stats["n_pixels"] == angles.size
+    assert np.isclose(stats["mean"], angles.mean())
+    assert np.isclose(stats["std"], angles.std())
+    # The percentiles invert the cumulative distribution to within a bin
+    width = 180 / _HISTOGRAM_BINS + 1e-9
+    expected = np.percentile(angles, [0, 10, 90, 100], method="inverted_cdf")
+    assert np.allclose(stats["percentiles"], expected, rtol=0, atol=width)
+    median = np.percentile(angles, 50, method="inverted_cdf")
+    assert np.isclose(stats["median"], median, rtol=0, atol=width)
+    # and are clamped to the angles
+    assert np.isclose(stats["percentiles"][0], angles.min())
+    assert np.isclose(stats["percentiles"][-1], angles.max())
+    assert np.isclose(stats["within"], np.mean(angles <= 20))
+
+    # Compressed samples weight the grains by their number of pixels
+    s.compress(tolerance=0.0)
+    compressed = s.angle_statistics(zone_axis, (10, -5), percentiles=(10, 90))
+    assert compressed["n_pixels"] == angles.size
+    assert np.isclose(compressed["median"], stats["median"], rtol=0, atol=width)
+
+
+@pytest.mark.parametrize("score", ["median", ("percentile", 75), ("within", 15)])
+def test_find_tilt_angles_robust_score(score, default_xmap, x, y):
+    from tiltlib.sample import _HISTOGRAM_BINS
+
+    s = Sample.from_crystal_map(
+        default_xmap,
+        [Axis(x, -30, 30, degrees=True), Axis(y, -30, 30, intrinsic=True)],
+    )
+    zone_axis = Miller(uvw=[1, 1, 1], phase=s.phase)
+    # The fraction within the tolerance is flat far from the tolerance
+    global_search = score[0] == "within"
+
+    res = s.find_tilt_angles(
+        zone_axis, full_output=True, score=score, global_search=global_search
+    )
+    angles = s.angle_with_at(res.x, zone_axis).ravel()
+    if score[0] == "within":
+        assert np.isclose(res.fun, np.mean(angles > 15))
+    else:
+        q = 50 if score == "median" else score[1]
+        # Within a bin of the inverse of the cumulative distribution
+        expected = np.percentile(angles, q, method="inverted_cdf")
+        assert np.isclose(res.fun, expected, rtol=0, atol=180 / _HISTOGRAM_BINS + 1e-9)
+
+    landscape = s.score_landscape(zone_axis, resolution=10, score=score)
+    grid = s.tilt_grid(10, degrees=True)
+    assert landscape.shape == tuple(len(g) for g in grid)
+    objective = s._optimize_angle_with_func(zone_axis, True, score=score)
+    assert np.isclose(landscape[2, 3], objective((grid[0][2], grid[1][3])))
+    s.plot_angle_with(zone_axis, resolution=10, score=score)
+
+    with pytest.raises(ValueError):
+        s.find_tilt_angles(zone_axis, score=score, use_mean_orientation=True)
+    with pytest.raises(ValueError):
+        s.find_tilt_angles(zone_axis, score=score, method="L-BFGS-B")
+    with pytest.raises(ValueError):
+        s.find_tilt_angles(zone_axis, score=("percentile", 101))
+    if global_search:
+        with pytest.raises(ValueError):
+            s.find_tilt_angles(zone_axis, score=score)
+
+
+@pytest.mark.parametrize("score", ["median", ("percentile", 25)])
+def test_find_tilt_angles_robust_score_search(score, x, y):
+    from tiltlib.synthetic import synthetic_sample
+
+    # A few grains and many mis-indexed pixels, whose scores change in steps
+    s = synthetic_sample(
+        (100, 100),
+        [Axis(x, -30, 30), Axis(y, -30, 30, intrinsic=True)],
+        n_grains=3,
+        spread=8,
+        noise=0.5,
+        outliers=0.2,
+        seed=0,
+    )
+    zone_axis = Miller(uvw=[0, 0, 1], phase=s.phase)
+    objective = s._optimize_angle_with_func(zone_axis, True, score=score)
+
+    # The local search leaves the start angles, and finds the global optimum
+    res = s.find_tilt_angles(zone_axis, full_output=True, score=score)
+    found = s.find_tilt_angles(
+        zone_axis, full_output=True, score=score, global_search=True
+    )
+    assert np.linalg.norm(res.x) > 1
+    assert res.fun < objective((0, 0)) - 1
+    assert res.fun <= found.fun + 0.1
+
+
+@pytest.mark.parametrize("use_mean_orientation", [False, True])
+def test_find_tilt_angles_many(use_mean_orientation: bool, default_xmap, x, y):
+    s = Sample.from_crystal_map(
+        default_xmap,
+        [Axis(x, -30, 30, degrees=True), Axis(y, -30, 30, intrinsic=True)],
+    )
+    zone_axes = Miller(
+        uvw=[[0, 0, 1], [1, 0, 1], [1, 1, 1], [1, 0, 0], [0, 1, 1]], phase=s.phase
+    )
+
+    table = s.find_tilt_angles_many(
+        zone_axes,
+        use_mean_orientation=use_mean_orientation,
+        resolution=10,
+        n_seeds=2,
+        workers=2,
+    )
+
+    assert table.shape == (5,)
+    assert np.allclose(table["zone_axis"], zone_axes.uvw)
+    assert np.array_equal(table["reachable"], table["residual"] <= 1.0)
+    # Symmetrically equivalent zone axes are equally well aligned
+    assert np.isclose(table["residual"][3], table["residual"][0])
+    assert np.isclose(table["residual"][4], table["residual"][1])
+    for row, zone_axis in zip(table, zone_axes):
+        # Both use the closed form where it exists, and a global search otherwise
+        closed_form = use_mean_orientation and s.solve_tilt_angles(zone_axis).size
+        found = s.find_tilt_angles(
+            zone_axis,
+            use_mean_orientation=use_mean_orientation,
+            global_search=not closed_form,
+            resolution=10,
+            n_seeds=2,
+            full_output=True,
+        )
+        assert np.allclose(row["angles"], found.x)
+        assert np.isclose(row["residual"], found.fun)
+    assert s.angles == s._initial_angles
+
+    # All zone axes are scored in one pass over the pixels
+    grid = s.tilt_grid(np.deg2rad(10))
+    scores = s._score_grid(grid, zone_axes, use_mean_orientation)
+    for i, zone_axis in enumerate(zone_axes):
+        assert np.allclose(
+            scores[..., i], s._score_grid(grid, zone_axis, use_mean_orientation)
+        )
+
+
+def test_tilt_solution_map(default_xmap, x, y):
+    axes = [Axis(x, -30, 30, degrees=True), Axis(y, -10, 10, intrinsic=True)]
+    s = Sample.from_crystal_map(default_xmap, axes)
+    zone_axis = Miller(uvw=[1, 1, 0], phase=s.phase)
+
+    solutions = s.tilt_solution_map(zone_axis)
+    assert solutions.shape == s.shape + (2,)
+    assert np.isnan(solutions[..., 0]).any()
+
+    quats = s._original_rotations.data.reshape(-1, 4)
+    for i in range(0, len(quats), 37):
+        pixel = Sample(quats[i : i + 1], s.phase, axes)
+        expected = pixel.solve_tilt_angles(zone_axis)
+        if expected.size:
+            assert np.allclose(solutions.reshape(-1, 2)[i], expected[0])
+        else:
+            assert np.isnan(solutions.reshape(-1, 2)[i]).all()
+
+    s.compress()
+    grains = s.tilt_solution_map(zone_axis, expand=False)
+    assert grains.shape == s.grain_weights.shape + (2,)
+    assert np.allclose(
+        s.tilt_solution_map(zone_axis), grains[s.grain_labels], equal_nan=True
+    )
+
+
+def test_single_precision(default_xmap, x, y):
+    axes = [Axis(x, -30, 30, degrees=True), Axis(y, -30, 30, intrinsic=True)]
+    s = Sample.from_crystal_map(default_xmap, axes)
+    s32 = Sample.from_crystal_map(default_xmap, axes, dtype=np.float32)
+    zone_axis = Miller(uvw=[1, 1, 1], phase=s.phase)
+
+    assert s32._quaternions.dtype == np.float32
+    assert s32._rotations is None
+    angles = s32.angle_with_at((10, -4), zone_axis)
+    assert angles.dtype == np.float32
+    assert np.allclose(angles, s.angle_with_at((10, -4), zone_axis), atol=1e-3)
+    assert np.allclose(
+        s32.score_landscape(zone_axis, 10), s.score_landscape(zone_axis, 10), atol=1e-3
+    )
+    assert np.allclose(
+        s32.find_tilt_angles(zone_axis), s.find_tilt_angles(zone_axis), atol=1e-2
+    )
+
+    s32.compress()
+    assert s32._grain_quaternions.dtype == np.float32
+    assert s32.crop(np.array([1, 2, 3])).dtype == np.float32
+
+    with pytest.raises(ValueError):
+        Sample.from_crystal_map(default_xmap, axes, dtype=np.int64)
+
+
+def test_crop_views(default_xmap, x, y):
+    s = Sample.from_crystal_map(
+        default_xmap,
+        [Axis(x, -30, 30, degrees=True), Axis(y, -30, 30, intrinsic=True)],
+    )
+    quats = s._original_rotations.data
+    flat_quats = quats.reshape(-1, 4)
+    rows, cols = np.indices(s.shape)
+    circle = (cols - 10) ** 2 + (rows - 8) ** 2 < 4**2
+    labels = (rows // 5) * 10 + cols // 5
+
+    crops = {
+        "rectangle": (s.crop(RectangularROI(2, 3, 12, 9)), quats[3:9, 2:12]),
+        "circle": (s.crop(CircleROI(10, 8, 4)), quats[circle]),
+        "label": (s.crop(labels, label=12), quats[labels == 12]),
+        "mask": (s.crop(circle), quats[circle]),
+        "index": (s.crop(np.array([400, 3, 77])), flat_quats[[400, 3, 77]]),
+    }
+    for cropped, expected in crops.values():
+        assert np.shares_memory(cropped._quaternions, s._quaternions)
+        assert cropped.shape == expected.shape[:-1]
+        assert np.allclose(cropped._original_rotations.data, expected)
+        assert np.allclose(flat_quats[cropped.parent_index], expected)
+
+    triangle = s.crop(PolygonROI([(2, 2), (15, 4), (8, 14)]))
+    assert 0 < triangle.shape[0] < 13 * 12
+    assert np.allclose(
+        triangle._original_rotations.data, flat_quats[triangle.parent_index]
+    )
+
+    # Crops of crops index into the same data, and map back to their parent
+    cropped = crops["circle"][0]
+    nested = cropped.crop(np.array([5, 1]))
+    assert nested._quaternions is cropped._quaternions
+    assert np.array_equal(nested.parent_index, [5, 1])
+    assert np.allclose(nested._original_rotations.data, quats[circle][[5, 1]])
+
+    zone_axis = Miller(uvw=[1, 1, 1], phase=s.phase)
+    copied = Sample(quats[circle], s.phase, s.axes)
+    assert np.allclose(
+        cropped.find_tilt_angles(zone_axis), copied.find_tilt_angles(zone_axis)
+    )
+    assert np.allclose(cropped.angle_with(zone_axis), copied.angle_with(zone_axis))
+
+    with pytest.raises(ValueError):
+        s.crop(labels, label=-1)
+
+
+def test_find_tilt_angles_regions(default_xmap, x, y):
+    from tiltlib import sample
+
+    s = Sample.from_crystal_map(
+        default_xmap,
+        [Axis(x, -30, 30, degrees=True), Axis(y, -30, 30, intrinsic=True)],
+    )
+    zone_axis = Miller(uvw=[1, 1, 1], phase=s.phase)
+    rois = [RectangularROI(2, 3, 12, 9), CircleROI(10, 8, 4)]
+
+    table = s.find_tilt_angles_regions(rois, zone_axis)
+    assert np.array_equal(table["region"], [0, 1])
+    for roi, row in zip(rois, table):
+        cropped = s.crop(roi)
+        assert row["n_pixels"] == cropped._original_rotations.size
+        res = cropped.find_tilt_angles(zone_axis, full_output=True)
+        assert np.allclose(row["angles"], res.x)
+        assert np.isclose(row["residual"], res.fun)
+    # Solving in this process leaves no module state behind
+    assert not sample._region_worker_state
+
+    # Regions without pixels are named in the error
+    for roi in (CircleROI(500, 500, 3), RectangularROI(500, 500, 510, 510)):
+        with pytest.raises(ValueError, match="contains no pixels"):
+            s.find_tilt_angles_regions([rois[0], roi], zone_axis)
+        with pytest.raises(ValueError, match="contains no pixels"):
+            s.crop(roi)
+
+    labels = np.zeros(s.shape, dtype=int)
+    labels[:10, :10] = 3
+    labels[10:, 5:] = 7
+    table = s.find_tilt_angles_regions(labels, zone_axis, workers=2)
+    assert np.array_equal(table["region"], [3, 7])
+    assert np.array_equal(table["n_pixels"], [100, 200])
+    for label, row in zip((3, 7), table):
+        region = Sample(s._original_rotations[labels == label], s.phase, s.axes)
+        assert np.allclose(row["angles"], region.find_tilt_angles(zone_axis))
+
+
+def test_reachable_zone_axes(default_xmap, x, y):
+    s = Sample.from_crystal_map(
+        default_xmap,
+        [Axis(x, -30, 30, degrees=True), Axis(y, -25, 25, intrinsic=True)],
+    )
+
+    table = s.reachable_zone_axes(max_index=3, resolution=1.0)
+    assert table["reachable"].all()
+    assert np.all(np.diff(table["tilt"]) >= 0)
+    assert np.all(table["residual"] <= 1.0)
+    for row in table:
+        zone_axis = Miller(uvw=row["zone_axis"], phase=s.phase)
+        score = s._optimize_mean_orientation_func(
+            zone_axis.in_fundamental_sector(), degrees=True
+        )
+        assert np.isclose(score(row["angles"]), row["residual"])
+        # The exact solution lies within the tolerance of the sampled tilt state,
+        # so it may be past a limit of the range if the state is near that limit
+        angles, margin = np.deg2rad(row["angles"]), np.deg2rad(1.0)
+        if all(ax.min + margin < a < ax.max - margin for ax, a in zip(s.axes, angles)):
+            assert s.solve_tilt_angles(zone_axis).size
+
+    # Looking up given zone axes keeps their order, and marks the unreachable ones
+    zone_axes = Miller(uvw=[[1, 1, 1], *table["zone_axis"][:2]], phase=s.phase)
+    lookup = s.reachable_zone_axes(zone_axes)
+    assert np.array_equal(lookup[1:], table[:2])
+    assert lookup["reachable"][0] == (not np.isnan(lookup["tilt"][0]))
+    assert s.angles == s._initial_angles
+
+
+@pytest.mark.parametrize("use_mean_orientation", [False, True])
+def test_objective_gradient(use_mean_orientation: bool, default_xmap, x, y):
+    s = Sample.from_crystal_map(
+        default_xmap,
+        [Axis(x, -30, 30, degrees=True), Axis(y, -30, 30, 5, intrinsic=True)],
+    )
+    zone_axis = Miller(uvw=[1, 1, 1], phase=s.phase)
+    if use_mean_orientation:
+        score = s._optimize_mean_orientation_func(zone_axis, degrees=True)
+        score_and_grad = s._optimize_mean_orientation_func(
+            zone_axis, degrees=True, jac=True
+        )
+    else:
+        score = s._optimize_angle_with_func(zone_axis, degrees=True)
+        score_and_grad = s._optimize_angle_with_func(
+            zone_axis, degrees=True, jac=True
+        )
+
+    angles = np.array([3.0, -4.0])
+    value, grad = score_and_grad(angles)
+    eps = 1e-5
+    finite_difference = [
+        (score(angles + eps * step) - score(angles - eps * step)) / (2 * eps)
+        for step in np.eye(2)
+    ]
+
+    assert np.isclose(value, score(angles))
+    assert np.allclose(grad, finite_difference, atol=1e-4)
+
+
+def test_find_tilt_angles_gradient_method(default_xmap, x, y):
+    s = Sample.from_crystal_map(
+        default_xmap,
+        [Axis(x, -30, 30, degrees=True), Axis(y, -30, 30, intrinsic=True)],
+    )
+    zone_axis = Miller(uvw=[1, 1, 1], phase=s.phase)
+
+    initial = s._optimize_angle_with_func(zone_axis, degrees=True)(s.angles)
+    reference = s.find_tilt_angles(zone_axis, full_output=True)
+    found = s.find_tilt_angles(zone_axis, method="L-BFGS-B", full_output=True)
+
+    assert found.fun < initial
+    assert found.nfev < reference.nfev
+
+    with pytest.raises(ValueError):
+        s.find_tilt_angles(zone_axis, method="BFGS")
+
+
+def test_score_landscape(default_xmap, x, y):
+    s = Sample.from_crystal_map(
+        default_xmap,
+        [Axis(x, -20, 20, degrees=True), Axis(y, -10, 10, intrinsic=True)],
+    )
+    zone_axis = Miller(uvw=[1, 1, 1], phase=s.phase)
+
+    landscape = s.score_landscape(zone_axis, resolution=5)
+    angles_1, angles_2 = s.tilt_grid(5, degrees=True)
+
+    assert landscape.shape == (angles_1.size, angles_2.size)
+    assert np.allclose(
+        landscape, s.score_landscape(zone_axis, resolution=5, memory_limit=1)
+    )
+
+    score = s._optimize_angle_with_func(zone_axis, degrees=True)
+    assert np.isclose(landscape[3, 1], score((angles_1[3], angles_2[1])))
+
+    # The plotted grid matches the scored grid, also where rounding the range in
+    # degrees and radians gives grids of different lengths
+    s = Sample.from_crystal_map(default_xmap, [Axis(x, -12, 12, degrees=True)])
+    fig = s.plot_angle_with(zone_axis, resolution=1)
+    (line,) = fig.axes[0].get_lines()
+    assert len(line.get_xdata()) == s.score_landscape(zone_axis, resolution=1).size
+
+
+def test_compress(default_xmap, x, y):
+    from orix.quaternion import Orientation
+
+    from tiltlib.synthetic import synthetic_sample
+
+    s = Sample.from_crystal_map(
+        default_xmap,
+        [Axis(x, -30, 30, degrees=True), Axis(y, -30, 30, intrinsic=True)],
+    )
+    s.rotate_to(5, 3, degrees=True)
+    zone_axis = Miller(uvw=[1, 1, 1], phase=s.phase)
+    expected = s.angle_with(zone_axis)
+    score = s._optimize_angle_with_func(zone_axis, degrees=True)
+    expected_score = score((5, 3))
+
+    s.compress(tolerance=1.0)
+
+    assert s.grain_labels.shape == expected.shape
+    assert s.grain_weights.sum() == expected.size
+    assert s.grain_weights.size == s.grain_labels.max() + 1
+    assert s.angle_with(zone_axis, expand=False).shape == s.grain_weights.shape
+    # Each pixel is within twice the tolerance of the mean of its grain
+    assert np.allclose(s.angle_with(zone_axis), expected, atol=2.0)
+    assert np.isclose(score((5, 3)), expected_score, atol=2.0)
+
+    s.decompress()
+
+    assert s.grain_labels is None
+    assert np.allclose(s.angle_with(zone_axis), expected)
+
+    # Noisy grains, where the mean of a grain is not its first pixel
+    s = synthetic_sample((100, 100), [Axis(x, -30, 30)], n_grains=10, noise=0.5, seed=0)
+    s.compress(tolerance=1.0)
+    symmetry = s.phase.point_group
+    pixels = Orientation(s._original_rotations.data.reshape(-1, 4), symmetry)
+    grains = Orientation(s._grain_quaternions[s.grain_labels.ravel()], symmetry)
+    misorientation = pixels.angle_with(grains, degrees=True)
+    assert misorientation.max() > 1.0
+    assert misorientation.max() <= 2.0 + 1e-6
+
+
+def test_streamed_sample(default_xmap, x, y, tmp_path):
+    import dask.array as da
+
+    axes = [Axis(x, -30, 30, degrees=True), Axis(y, -30, 30, intrinsic=True)]
+    s = Sample.from_crystal_map(default_xmap, axes)
+    zone_axis = Miller(uvw=[1, 1, 1], phase=s.phase)
+    quats = s._original_rotations.data
+    np.save(tmp_path / "quats.npy", quats)
+    row_size = quats.shape[1]
+
+    for streamed in [
+        Sample.from_npy(tmp_path / "quats.npy", s.phase, axes, chunk_size=3 * row_size),
+        Sample(da.from_array(quats, chunks=(5, -1, -1)), s.phase, axes, row_size),
+    ]:
+        for sample in (s, streamed):
+            sample.rotate_to(4, -6, degrees=True)
+
+        assert np.allclose(streamed.angle_with(zone_axis), s.angle_with(zone_axis))
+        expected, expected_grad = s._optimize_angle_with_func(
+            zone_axis, True, jac=True
+        )((4, -6))
+        score, grad = streamed._optimize_angle_with_func(zone_axis, True, jac=True)(
+            (4, -6)
+        )
+        assert np.isclose(score, expected)
+        assert np.allclose(grad, expected_grad)
+        assert np.allclose(
+            streamed.to_signal().data.compute(), s.to_signal().data
+        )
+        assert streamed.mean_zone_axis() == s.mean_zone_axis()
+        assert streamed.orientations == s.orientations
+        assert not streamed.cache_orientations
+        assert streamed._orientations_cache is None
+        # Nothing was read into memory as a whole, nor kept after reading it
+        assert streamed._rotations is None
+
+    streamed = Sample.from_npy(tmp_path / "quats.npy", s.phase, axes, dtype=np.float32)
+    assert streamed.dtype == np.float32
+
+
+def test_streamed_crop(default_xmap, x, y, tmp_path):
+    axes = [Axis(x, -30, 30, degrees=True), Axis(y, -30, 30, intrinsic=True)]
+    s = Sample.from_crystal_map(default_xmap, axes)
+    quats = s._original_rotations.data
+    flat_quats = quats.reshape(-1, 4)
+    n_rows, row_size = quats.shape[:2]
+
+    class Recorded:
+        """Array-like data recording the rows read from it"""
+
+        shape, dtype, reads = quats.shape, quats.dtype, []
+
+        def __getitem__(self, key):
+            self.reads.append(range(n_rows)[key])
+            return quats[key]
+
+    streamed = Sample(Recorded(), s.phase, axes, chunk_size=2 * row_size)
+    in_memory = Sample(quats, s.phase, axes, chunk_size=2 * row_size, copy=False)
+    index = np.array([5 * row_size + 3, 1, 5 * row_size, 1, (n_rows - 1) * row_size])
+    for sample in (streamed, in_memory):
+        cropped = sample.crop(index)
+        assert np.allclose(cropped._flat_quaternions(), flat_quats[index])
+    # Only the row blocks holding selected pixels are read, a few rows at a time
+    assert [(r.start, r.stop) for r in Recorded.reads] == [
+        (0, 2),
+        (5, 7),
+        (n_rows - 1, n_rows),
+    ]
+
+    mask = np.zeros(s.shape, dtype=bool)
+    mask[::7, ::3] = True
+    cropped = streamed.crop(mask)
+    assert np.allclose(cropped._flat_quaternions(), quats[mask])
+    assert np.allclose(
+        cropped.angle_with(Miller(uvw=[1, 1, 1], phase=s.phase)),
+        s.crop(mask).angle_with(Miller(uvw=[1, 1, 1], phase=s.phase)),
+    )
+    assert max(len(r) for r in Recorded.reads) <= 2
+
+
+def test_rotation_table_orientations(default_xmap, x, y):
+    s = Sample.from_crystal_map(
+        default_xmap,
+        [Axis(x, -30, 30, degrees=True), Axis(y, -30, 30, intrinsic=True)],
+    )
+    s.rotate_to(12, -7, degrees=True)
+    expected = s.orientations_at((12, -7), degrees=True)
+
+    # The orientations shown by the interactive plots are tilted with the table
+    s.build_rotation_table(2)
+    calls = []
+    interpolate = s._interpolate_rotation_table
+    s._interpolate_rotation_table = lambda a: calls.append(len(a)) or interpolate(a)
+    s.cache_orientations = False
+    assert np.allclose(s.orientations.data, expected.data, atol=1e-12)
+    assert calls == [1]
+
+
+@pytest.mark.parametrize("cache_orientations", [True, False])
+def test_orientations_cache(cache_orientations: bool, default_xmap, x):
+    s = Sample.from_crystal_map(default_xmap, [Axis(x, -30, 30, degrees=True)])
+    s.cache_orientations = cache_orientations
+
+    first = s.orientations
+    assert (s.orientations is first) == cache_orientations
+
+    s.rotate(10, degrees=True)
+    tilted = s.orientations
+    assert tilted is not first
+    assert tilted != first
+
+    s.reset_rotation()
+    assert s.orientations == first
+
+
+def test_stateless_evaluation(default_xmap, x, y):
+    s = Sample.from_crystal_map(
+        default_xmap,
+        [Axis(x, -30, 30, degrees=True), Axis(y, -30, 30, 5, intrinsic=True)],
+    )
+    zone_axis = Miller(uvw=[1, 1, 0], phase=s.phase)
+
+    oris = s.orientations_at((10, -4), degrees=True)
+    angles = s.angle_with_at((10, -4), zone_axis)
+    assert s.angles == s._initial_angles
+
+    s.rotate_to(10, -4, degrees=True)
+    assert oris == s.orientations
+    assert np.allclose(angles, s.angle_with(zone_axis))
+    assert np.allclose(
+        s.angle_with_at(np.deg2rad((10, -4)), zone_axis, degrees=False),
+        np.deg2rad(angles),
+    )
+
+    with pytest.raises(IndexError):
+        s.angle_with_at((40, 0), zone_axis)
+
+    # Searching and plotting leaves the holder as it was
+    s.find_tilt_angles(zone_axis)
+    assert np.allclose(s.angles, np.deg2rad((10, -4)))
+
+
+def test_warmup():
+    import os
+
+    from tiltlib import sample, warmup
+
+    warmup((np.float64,))
+
+    kernels = [
+        sample._jit_angle_with,
+        sample._jit_angle_with_parallel,
+        sample._jit_mean_angle_with,
+        sample._jit_mean_angle_with_parallel,
+        sample._jit_mean_angle_with_gradient,
+        sample._jit_mean_angle_with_gradient_parallel,
+        sample._jit_cluster,
+    ]
+    index_paths = set()
+    for kernel in kernels:
+        assert kernel.signatures
+        index_path = kernel._cache._cache_file._index_path
+        assert os.path.exists(index_path)
+        index_paths.add(index_path)
+    # The serial and parallel variants must not share cache entries
+    assert len(index_paths) == len(kernels)
@@ -187,3 +187,111 @@ def test_reset_rotation(x, y, z):
 
     b.reset_rotation()
     assert np.allclose(b.rotation_matrix(), np.eye(3))
+
+
+def test_rotations_at(x, y, z):
+    from tiltlib.sample_holder import Axis, SampleHolder
+
+    b = SampleHolder(
+        [
+            Axis(x, -60, 60),
+            Axis(y, -60, 60, intrinsic=True),
+            Axis(z, -60, 60, 10, intrinsic=False),
+        ]
+    )
+
+    rng = np.random.default_rng(0)
+    angles = rng.random((20, 3)) * 120 - 60
+    rotations = b.rotations_at(angles, degrees=True)
+
+    assert rotations.shape == (20,)
+    for angle, rotation in zip(angles, rotations):
+        # Compose the axis rotations one at a time, independently of rotations_at
+        b.rotate_to(angle, degrees=True)
+        R = b.axes[0].R
+        for axis in b.axes[1:]:
+            R = R * axis.R if axis.intrinsic else axis.R * R
+        assert np.allclose(rotation.to_matrix(), R.to_matrix())
+
+    # too few angles
+    with pytest.raises(ValueError):
+        b.rotations_at(angles[:, :2])
+
+    # out of range
+    with pytest.raises(IndexError):
+        b.rotations_at(angles + 100, degrees=True)
+
+    b = SampleHolder([Axis(x, -60, 60)])
+    assert b.rotations_at(np.linspace(-1, 1, 5)).shape == (5,)
+
+
+def test_rotation_table(x, y, z):
+    from tiltlib.sample_holder import Axis, SampleHolder
+
+    b = SampleHolder(
+        [
+            Axis(x, -60, 60),
+            Axis(y, -45, 30, 5, intrinsic=True),
+            Axis(z, -60, 60, 10, intrinsic=False),
+        ]
+    )
+
+    rng = np.random.default_rng(0)
+    angles = np.deg2rad(rng.random((200, 3)) * [120, 75, 120] - [60, 45, 60])
+    angles[0] = [ax.min for ax in b.axes]
+    angles[1] = [ax.max for ax in b.axes]
+    expected = b.rotations_at(angles)
+
+    b.build_rotation_table(7)
+    interpolated = b._interpolate_rotation_table(angles)
+    assert np.allclose(interpolated, expected.data, atol=1e-12)
+    b.rotate_to(12, -3, 40, degrees=True)
+    matrix = b.to_matrix()
+
+    b.build_rotation_table(None)
+    assert np.allclose(b.to_matrix(), matrix, atol=1e-12)
+
+    # Both single tilt states and many at once are looked up in the table
+    b.build_rotation_table(7)
+    calls = []
+    interpolate = b._interpolate_rotation_table
+    b._interpolate_rotation_table = lambda a: calls.append(len(a)) or interpolate(a)
+    assert np.allclose(b.rotations_at(angles).data, expected.data, atol=1e-12)
+    b.rotate_to(12, -3, 40, degrees=True)
+    assert np.allclose(b.to_matrix(), matrix, atol=1e-12)
+    assert calls == [200, 1]
+    with pytest.raises(IndexError):
+        b.rotations_at(angles + 100, degrees=True)
+
+
+@pytest.mark.parametrize("intrinsic", [True, False])
+def test_align_angles(intrinsic: bool, x, y, z):
+    from tiltlib.sample_holder import Axis, SampleHolder
+
+    b = SampleHolder(
+        [Axis(x, -40, 40, 5), Axis(y, -40, 40, -10, intrinsic=intrinsic)]
+    )
+
+    rng = np.random.default_rng(0)
+    angles = np.deg2rad(rng.random((10, 2)) * 60 - 30)
+    for angle in angles:
+        # The direction which is along the optical axis at the given angles must be reachable
+        b.rotate_to(angle)
+        v = b.TEM_frame_to_sample_frame(z)
+        b.reset_rotation()
+
+        solutions = b.align_angles(v)
+        assert solutions.shape[1] == 2
+        assert np.any(np.all(np.isclose(solutions, angle), axis=-1))
+        for solution in solutions:
+            b.rotate_to(solution)
+            assert vec_eq(b.sample_frame_to_TEM_frame(v), z)
+
+    # Out of reach
+    assert b.align_angles(x).shape == (0, 2)
+
+    with pytest.raises(NotImplementedError):
+        SampleHolder([Axis(x, -40, 40)]).align_angles(z)
+
+    with pytest.raises(NotImplementedError):
+        SampleHolder([Axis(x, -40, 40), Axis(-x, -40, 40)]).align_angles(z)
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from orix.quaternion import Rotation
+from orix.vector import Miller
+
+from .conftest import x, y
+
+from tiltlib import Axis, Sample
+
+
+def test_synthetic_quaternions(tmp_path):
+    from tiltlib.synthetic import synthetic_quaternions
+
+    quats = synthetic_quaternions((50, 60), n_grains=7, seed=0, chunk_size=1000)
+    assert quats.shape == (50, 60, 4)
+    assert np.allclose(np.linalg.norm(quats, axis=-1), 1)
+    # Without noise, every pixel has the orientation of its grain
+    assert len(np.unique(quats.reshape(-1, 4), axis=0)) == 7
+
+    # Reproducible, also when written to a memory-mapped array
+    out = np.lib.format.open_memmap(
+        tmp_path / "quats.npy", mode="w+", dtype=np.float32, shape=(50, 60, 4)
+    )
+    synthetic_quaternions((50, 60), n_grains=7, seed=0, chunk_size=1000, out=out)
+    assert np.allclose(out, quats, atol=1e-7)
+    assert not np.array_equal(
+        synthetic_quaternions((50, 60), n_grains=7, seed=1, chunk_size=1000), quats
+    )
+
+    # Spread and noise, in degrees
+    quats = synthetic_quaternions((40, 40), n_grains=5, spread=2, noise=0.5, seed=0)
+    angles = np.rad2deg(Rotation(quats.reshape(-1, 4)).angle)
+    assert np.median(angles) < 10
+    outliers = synthetic_quaternions((40, 40), n_grains=5, spread=2, outliers=0.5)
+    angles = np.rad2deg(Rotation(outliers.reshape(-1, 4)).angle)
+    assert 0.3 < np.mean(angles > 20) < 0.7
+
+    with pytest.raises(ValueError):
+        synthetic_quaternions((10, 10), n_grains=0)
+    with pytest.raises(ValueError):
+        synthetic_quaternions((10, 10), outliers=2)
+    with pytest.raises(ValueError):
+        synthetic_quaternions((10, 10), out=np.empty((10, 11, 4)))
+
+
+def test_synthetic_sample(x, y):
+    from tiltlib.synthetic import synthetic_crystal_map, synthetic_sample
+
+    axes = [Axis(x, -30, 30), Axis(y, -30, 30, intrinsic=True)]
+    xmap = synthetic_crystal_map((20, 30), n_grains=4, noise=1, seed=0)
+    assert xmap.shape == (20, 30)
+    s = Sample.from_crystal_map(xmap, axes)
+    assert s.shape == (20, 30)
+
+    # A textured sample close to the identity can be aligned with [001]
+    s = synthetic_sample((30, 30), axes, n_grains=4, spread=2, noise=0.5, seed=0)
+    zone_axis = Miller(uvw=[0, 0, 1], phase=s.phase)
+    angles = s.find_tilt_angles(zone_axis)
+    assert s.angle_with_at(angles, zone_axis).mean() < 3
+
+    out = np.empty((30, 30, 4))
+    streamed = synthetic_sample(
+        (30, 30), axes, out=out, n_grains=4, spread=2, noise=0.5, seed=0
+    )
+    assert streamed._quaternions is out
+    assert np.allclose(streamed.angle_with(zone_axis), s.angle_with(zone_axis))
+
+    with pytest.raises(ValueError):
+        synthetic_crystal_map((10, 10, 10))